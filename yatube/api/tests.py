@@ -0,0 +1,131 @@
+import json
+from datetime import timedelta
+
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.constants import CURSOR_NEXT, MAX_POSTS_COUNT
+from posts.models import Group, Post, User
+from posts.utils import encode_cursor
+
+POSTS_URL = reverse('api:posts')
+GROUP_URL = reverse('api:group', kwargs={'slug': 'group'})
+PROFILE_URL = reverse('api:profile', kwargs={'username': 'author'})
+
+
+class ApiReadTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='author', first_name='Лев', last_name='Толстой')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='group', description='Описание')
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=cls.author,
+                 group=cls.group if i % 2 else None)
+            for i in range(MAX_POSTS_COUNT + 5))
+
+    def setUp(self):
+        self.client = Client()
+
+    def test_list_walks_cursor_pages(self):
+        """Список постов листается курсором и отдаёт выбранные поля."""
+        url, texts = POSTS_URL + '?fields=text,group', []
+        while url:
+            with self.assertNumQueries(1):
+                data = self.client.get(url).json()
+            texts.extend(row['text'] for row in data['results'])
+            self.assertTrue(all(
+                set(row) == {'text', 'group'} for row in data['results']))
+            url = data['next']
+        self.assertEqual(
+            texts, list(Post.objects.values_list('text', flat=True)))
+
+    def test_cursor_past_last_post_returns_first_page(self):
+        """Курсор за последним постом отдаёт первую страницу, а не 500."""
+        oldest = Post.objects.order_by('pub_date', 'id').first()
+        cursor = encode_cursor(
+            CURSOR_NEXT, (oldest.pub_date - timedelta(days=1), oldest.pk))
+        for url in (POSTS_URL, GROUP_URL):
+            with self.subTest(url=url):
+                response = self.client.get(url, {'cursor': cursor})
+                self.assertEqual(response.status_code, 200)
+                self.assertIsNone(response.json()['previous'])
+
+    def test_cursor_with_huge_id_returns_first_page(self):
+        """Курсор с id за пределами INTEGER отдаёт первую страницу."""
+        cursor = encode_cursor(
+            CURSOR_NEXT, (Post.objects.first().pub_date, 10 ** 23))
+        response = self.client.get(POSTS_URL, {'cursor': cursor})
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.json()['previous'])
+
+    def test_detail(self):
+        """Пост отдаётся со всеми полями, неизвестные поля — ошибка 400."""
+        post = Post.objects.filter(group=self.group).first()
+        url = reverse('api:post', kwargs={'post_id': post.pk})
+        data = self.client.get(url).json()
+        self.assertEqual(
+            (data['id'], data['text'], data['author'], data['group']),
+            (post.pk, post.text, 'author', 'group'))
+        self.assertEqual(
+            self.client.get(url, {'fields': 'id,secret'}).status_code, 400)
+        self.assertEqual(self.client.get(
+            reverse('api:post', kwargs={'post_id': 0})).status_code, 404)
+
+    def test_group_and_profile(self):
+        """Группа и профиль отдаются вместе с первой страницей постов."""
+        data = self.client.get(GROUP_URL).json()
+        self.assertEqual(data['group']['title'], 'Тестовая группа')
+        self.assertTrue(all(
+            row['group'] == 'group' for row in data['results']))
+        data = self.client.get(PROFILE_URL).json()
+        self.assertEqual(data['author']['first_name'], 'Лев')
+        self.assertEqual(data['author']['posts_count'], MAX_POSTS_COUNT + 5)
+        self.assertEqual(len(data['results']), MAX_POSTS_COUNT)
+
+
+class ApiWriteTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.another = User.objects.create_user(username='another')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='group', description='Описание')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def post_json(self, url, data, client=None):
+        return (client or self.client).post(
+            url, json.dumps(data), content_type='application/json')
+
+    def test_create_and_edit(self):
+        """Создание и правка проходят проверку PostForm."""
+        response = self.post_json(
+            POSTS_URL, {'text': 'Новый пост', 'group': self.group.pk})
+        self.assertEqual(response.status_code, 201)
+        post = Post.objects.get(pk=response.json()['id'])
+        self.assertEqual(
+            (post.text, post.author, post.group),
+            ('Новый пост', self.author, self.group))
+        url = reverse('api:post', kwargs={'post_id': post.pk})
+        response = self.post_json(url, {'text': 'Исправленный пост'})
+        self.assertEqual(response.json()['text'], 'Исправленный пост')
+        self.assertIsNone(response.json()['group'])
+        response = self.post_json(url, {'text': ''})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('text', response.json()['errors'])
+
+    def test_write_permissions(self):
+        """Писать может только автор, гость получает 401."""
+        post = Post.objects.create(text='Пост', author=self.another)
+        url = reverse('api:post', kwargs={'post_id': post.pk})
+        self.assertEqual(
+            self.post_json(url, {'text': 'Чужой'}).status_code, 403)
+        self.assertEqual(self.post_json(
+            POSTS_URL, {'text': 'Пост'}, Client()).status_code, 401)
+        self.assertEqual(Post.objects.get(pk=post.pk).text, 'Пост')
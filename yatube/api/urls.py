@@ -0,0 +1,12 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'api'
+
+urlpatterns = [
+    path('v1/posts/', views.posts, name='posts'),
+    path('v1/posts/<int:post_id>/', views.post, name='post'),
+    path('v1/groups/<slug:slug>/', views.group, name='group'),
+    path('v1/profiles/<str:username>/', views.profile, name='profile'),
+]
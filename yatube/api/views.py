@@ -0,0 +1,183 @@
+"""JSON API v1: посты, группы и профили.
+
+Списки читаются через values() — без создания моделей и только с
+запрошенными колонками (?fields=id,text,author), — и листаются курсором,
+как ?cursor= в HTML-лентах. Создание и правка проверяются PostForm.
+"""
+import json
+from functools import wraps
+from operator import itemgetter
+
+from django.http import HttpResponse
+
+from core.routers import replica_reads
+from posts.constants import CURSOR_PARAM
+from posts.forms import PostForm
+from posts.models import Group, Post, PostCounter, User
+from posts.utils import cursor_page
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# поле ответа -> поле для values()
+FIELDS = {
+    'id': 'id',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'updated_at': 'updated_at',
+    'author': 'author__username',
+    'group': 'group__slug',
+}
+FIELDS_PARAM = 'fields'
+
+
+def dumps(data):
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(
+        data, ensure_ascii=False, default=lambda value: value.isoformat()
+    ).encode()
+
+
+def json_response(data, status=200):
+    return HttpResponse(
+        dumps(data), content_type='application/json', status=status)
+
+
+def error(status, detail, **extra):
+    return json_response({'detail': detail, **extra}, status=status)
+
+
+def with_fields(view):
+    """Передаёт во view поля из ?fields= (по умолчанию все)."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        names = [
+            name for name in request.GET.get(FIELDS_PARAM, '').split(',')
+            if name
+        ] or list(FIELDS)
+        if set(names) - set(FIELDS):
+            return error(400, f'Допустимые поля: {", ".join(FIELDS)}.')
+        return view(request, names, *args, **kwargs)
+    return wrapper
+
+
+def project(rows, names):
+    return [{name: row[FIELDS[name]] for name in names} for row in rows]
+
+
+def page_url(request, cursor):
+    if cursor is None:
+        return None
+    query = request.GET.copy()
+    query[CURSOR_PARAM] = cursor
+    return request.build_absolute_uri(f'{request.path}?{query.urlencode()}')
+
+
+def posts_page(request, post_list, names):
+    # id и pub_date нужны курсору, даже если их нет в ответе
+    lookups = {FIELDS[name] for name in names} | {'id', 'pub_date'}
+    page = cursor_page(
+        post_list.values(*lookups), request.GET.get(CURSOR_PARAM),
+        itemgetter('pub_date', 'id'))
+    return {
+        'results': project(page, names),
+        'next': page_url(request, page.next_cursor),
+        'previous': page_url(request, page.previous_cursor),
+    }
+
+
+def post_data(request):
+    if request.content_type != 'application/json':
+        return request.POST
+    try:
+        return json.loads(request.body)
+    except ValueError:
+        return None
+
+
+def save_post(request, instance=None):
+    data = post_data(request)
+    if not isinstance(data, dict):
+        return error(400, 'Некорректный JSON.')
+    form = PostForm(data, instance=instance)
+    if not form.is_valid():
+        return error(
+            400, 'Ошибка в данных поста.', errors=form.errors.get_json_data())
+    post = form.save(False)
+    if instance is None:
+        post.author = request.user
+    post.save()
+    return json_response(
+        project(Post.objects.filter(pk=post.pk).values(*FIELDS.values()),
+                FIELDS)[0],
+        status=201 if instance is None else 200)
+
+
+@replica_reads
+@with_fields
+def post_list(request, names):
+    return json_response(posts_page(request, Post.objects.all(), names))
+
+
+@replica_reads
+@with_fields
+def post_detail(request, names, post_id):
+    rows = project(Post.objects.filter(pk=post_id).values(
+        *{FIELDS[name] for name in names}), names)
+    if not rows:
+        return error(404, 'Пост не найден.')
+    return json_response(rows[0])
+
+
+def posts(request):
+    if request.method == 'GET':
+        return post_list(request)
+    if request.method != 'POST':
+        return error(405, 'Метод не поддерживается.')
+    if not request.user.is_authenticated:
+        return error(401, 'Нужна авторизация.')
+    return save_post(request)
+
+
+def post(request, post_id):
+    if request.method == 'GET':
+        return post_detail(request, post_id)
+    if request.method != 'POST':
+        return error(405, 'Метод не поддерживается.')
+    if not request.user.is_authenticated:
+        return error(401, 'Нужна авторизация.')
+    instance = Post.objects.filter(pk=post_id).first()
+    if instance is None:
+        return error(404, 'Пост не найден.')
+    if instance.author_id != request.user.pk:
+        return error(403, 'Редактировать можно только свои посты.')
+    return save_post(request, instance)
+
+
+@replica_reads
+@with_fields
+def group(request, names, slug):
+    group = Group.objects.filter(slug=slug).values(
+        'id', 'slug', 'title', 'description').first()
+    if group is None:
+        return error(404, 'Группа не найдена.')
+    page = posts_page(
+        request, Post.objects.filter(group=group.pop('id')), names)
+    return json_response({'group': group, **page})
+
+
+@replica_reads
+@with_fields
+def profile(request, names, username):
+    author = User.objects.filter(username=username).values(
+        'id', 'username', 'first_name', 'last_name').first()
+    if author is None:
+        return error(404, 'Автор не найден.')
+    author_id = author.pop('id')
+    page = posts_page(request, Post.objects.filter(author=author_id), names)
+    author['posts_count'] = PostCounter.objects.value(
+        PostCounter.author_key(author_id))
+    return json_response({'author': author, **page})
@@ -3,3 +3,17 @@ from django.apps import AppConfig
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from django.conf import settings
+        from django.db.backends.signals import connection_created
+        from django.template.loader import get_template
+
+        from .db import apply_sqlite_pragmas
+
+        connection_created.connect(apply_sqlite_pragmas)
+
+        # с cached.Loader шаблоны компилируются здесь, а не на первом запросе
+        if settings.TEMPLATE_CACHE:
+            for template_name in settings.TEMPLATE_PRELOAD:
+                get_template(template_name)
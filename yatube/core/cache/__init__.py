@@ -0,0 +1,4 @@
+"""Кэш-бэкенды со статистикой попаданий, промахов и вытеснений."""
+
+# кэш, общий для всех воркеров: версии лент и страниц, метки изменений
+SHARED_CACHE = 'shared'
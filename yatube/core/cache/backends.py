@@ -0,0 +1,139 @@
+"""Кэш-бэкенды со статистикой попаданий, промахов и вытеснений."""
+import pickle
+from threading import Lock
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.filebased import (
+    FileBasedCache as DjangoFileBasedCache)
+from django.core.cache.backends.locmem import LocMemCache
+
+_MISSING = object()
+_sizes = {}
+_stats = {}
+
+
+class _Sizes(dict):
+    """Размеры записей кэша и их сумма."""
+    total = 0
+
+    def put(self, key, size):
+        self.discard(key)
+        self[key] = size
+        self.total += size
+
+    def discard(self, key):
+        self.total -= self.pop(key, 0)
+
+    def clear(self):
+        super().clear()
+        self.total = 0
+
+
+class CacheStats:
+    """Счётчики кэша в пределах процесса."""
+
+    def __init__(self):
+        self._lock = Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def record(self, hits=0, misses=0, evictions=0):
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+            self.evictions += evictions
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+class StatsMixin:
+    def __init__(self, name, params):
+        super().__init__(name, params)
+        self.stats = _stats.setdefault(name, CacheStats())
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version)
+        if value is _MISSING:
+            self.stats.record(misses=1)
+            return default
+        self.stats.record(hits=1)
+        return value
+
+
+class LRUCache(StatsMixin, LocMemCache):
+    """Кэш в памяти процесса с вытеснением давно не читанных записей.
+
+    Кроме MAX_ENTRIES ограничивает суммарный размер значений в байтах
+    (OPTIONS['MAX_BYTES'], 0 — без ограничения). В отличие от LocMemCache
+    при переполнении вытесняет ровно столько записей, сколько нужно.
+    """
+
+    def __init__(self, name, params):
+        super().__init__(name, params)
+        self._max_bytes = int(params.get('OPTIONS', {}).get('MAX_BYTES', 0))
+        self._sizes = _sizes.setdefault(name, _Sizes())
+
+    def _set(self, key, value, timeout=DEFAULT_TIMEOUT):
+        self._delete(key)
+        evicted = 0
+        while self._cache and (
+            len(self._cache) >= self._max_entries
+            or self._max_bytes and (
+                self._sizes.total + len(value) > self._max_bytes)
+        ):
+            oldest, _ = self._cache.popitem()
+            self._expire_info.pop(oldest, None)
+            self._sizes.discard(oldest)
+            evicted += 1
+        if evicted:
+            self.stats.record(evictions=evicted)
+        self._cache[key] = value
+        self._cache.move_to_end(key, last=False)
+        self._expire_info[key] = self.get_backend_timeout(timeout)
+        self._sizes.put(key, len(value))
+
+    def incr(self, key, delta=1, version=None):
+        value = super().incr(key, delta, version)
+        with self._lock:
+            self._sizes.put(
+                self.make_key(key, version=version),
+                len(pickle.dumps(value, self.pickle_protocol)))
+        return value
+
+    def _delete(self, key):
+        super()._delete(key)
+        self._sizes.discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self._expire_info.clear()
+            self._sizes.clear()
+
+
+class FileBasedCache(StatsMixin, DjangoFileBasedCache):
+    """Файловый кэш, общий для всех воркеров на одном хосте."""
+
+    def _cull(self):
+        before = len(self._list_cache_files())
+        if before < self._max_entries:
+            return
+        super()._cull()
+        self.stats.record(
+            evictions=before - len(self._list_cache_files()))
+
+
+def cache_stats():
+    """Статистика всех настроенных кэшей, которые её собирают."""
+    return {
+        alias: caches[alias].stats.as_dict()
+        for alias in settings.CACHES
+        if isinstance(caches[alias], StatsMixin)
+    }
@@ -0,0 +1,19 @@
+"""Настройка соединений SQLite под одновременные чтение и запись."""
+from django.conf import settings
+
+
+def sqlite_pragmas(connection):
+    """Выполняет PRAGMA из settings.SQLITE_PRAGMAS на новом соединении.
+
+    journal_mode=WAL сохраняется в файле базы, остальные прагмы
+    действуют только на соединение, поэтому их нужно ставить при
+    каждом подключении.
+    """
+    for name, value in settings.SQLITE_PRAGMAS.items():
+        connection.connection.execute(f'PRAGMA {name} = {value}')
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """Обработчик connection_created."""
+    if connection.vendor == 'sqlite':
+        sqlite_pragmas(connection)
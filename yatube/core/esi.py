@@ -0,0 +1,28 @@
+"""Вставки в духе Edge Side Includes.
+
+В режиме ESI тег {% esi_include %} вместо фрагмента выводит метку с
+именем шаблона и его параметрами. Страница с метками одна на всех
+пользователей и кэшируется (EsiPageCacheMiddleware), а фрагменты —
+шапка, ссылки автора — рендерятся под конкретного пользователя при
+каждом запросе и вставляются на место меток.
+"""
+import json
+import re
+
+from django.template.loader import render_to_string
+
+MARKER = re.compile(r'<!--esi (\{.*?\})-->')
+
+
+def esi_marker(template_name, params):
+    data = json.dumps({'template': template_name, **params})
+    # JSON внутри HTML-комментария не должен его закрыть
+    return '<!--esi {}-->'.format(data.replace('>', '\\u003e'))
+
+
+def stitch(content, request):
+    """Заменяет метки фрагментами, отрендеренными для request.user."""
+    def render(match):
+        params = json.loads(match.group(1))
+        return render_to_string(params.pop('template'), params, request)
+    return MARKER.sub(render, content)
@@ -0,0 +1,313 @@
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack
+from hashlib import md5
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.core.cache import cache, caches
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.http import HttpResponse
+from django.utils.cache import (get_cache_key, get_conditional_response,
+                                learn_cache_key, patch_vary_headers)
+from django.utils.functional import SimpleLazyObject
+from django.utils.http import parse_http_date_safe, quote_etag
+from django.utils.translation import get_language
+
+from .cache import SHARED_CACHE
+from .esi import stitch
+from .routers import PIN_COOKIE, primary_writes
+from .timing import RequestStats, current_stats
+
+logger = logging.getLogger('yatube.requests')
+
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+# версия всех страниц в кэше AnonymousPageCacheMiddleware
+PAGE_CACHE_VERSION = 'pages:version'
+
+DEFAULT_PAGE_CACHE = {
+    'ENABLED': True,
+    'TIMEOUT': 60,
+    # имена URL страниц, которые можно отдавать анонимам из кэша
+    'VIEWS': (),
+    # общие страницы с вставками для вошедших (EsiPageCacheMiddleware)
+    'ESI': False,
+}
+# заголовки, которые не попадают в общую копию страницы
+PERSONAL_HEADERS = ('ETag', 'Content-Length', 'Vary', 'Set-Cookie')
+
+DEFAULT_REQUEST_TIMING = {
+    # запросы медленнее порога логируются вместе со списком SQL
+    'SLOW_MS': 500,
+    # доля медленных запросов, для которых сохраняется список SQL
+    'SLOW_SAMPLE_RATE': 1.0,
+    'MAX_QUERIES_LOGGED': 50,
+}
+
+
+class RequestTimingMiddleware:
+    """Время SQL, шаблонов и всего запроса в Server-Timing и в логе.
+
+    Лёгкая замена debug toolbar для продакшена: считает запросы через
+    execute_wrapper и не требует DEBUG.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.options = {
+            **DEFAULT_REQUEST_TIMING,
+            **getattr(settings, 'REQUEST_TIMING', {}),
+        }
+
+    def __call__(self, request):
+        stats = RequestStats(self.options['MAX_QUERIES_LOGGED'])
+        token = current_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(stats.record_query))
+                response = self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        total_ms = (time.perf_counter() - started) * 1000
+        response['Server-Timing'] = ', '.join((
+            f'db;dur={stats.sql_ms:.1f};desc="{stats.query_count} queries"',
+            f'tpl;dur={stats.template_ms:.1f}',
+            f'total;dur={total_ms:.1f}',
+        ))
+        self.log(request, response, stats, total_ms)
+        return response
+
+    def log(self, request, response, stats, total_ms):
+        match = request.resolver_match
+        record = {
+            'view': match.view_name if match else None,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': stats.query_count,
+            'sql_ms': round(stats.sql_ms, 1),
+            'template_ms': round(stats.template_ms, 1),
+            'total_ms': round(total_ms, 1),
+        }
+        if total_ms < self.options['SLOW_MS']:
+            logger.info(json.dumps(record, ensure_ascii=False))
+            return
+        if random.random() < self.options['SLOW_SAMPLE_RATE']:
+            record['sql'] = stats.queries
+        logger.warning(json.dumps(record, ensure_ascii=False))
+
+
+class ReplicaPinMiddleware:
+    """Закрепляет пользователя за основной базой после его записи.
+
+    Стоит до SessionMiddleware, чтобы учесть и сохранение сессии при входе.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        written = []
+
+        def detect_writes(execute, sql, params, many, context):
+            if sql.lstrip()[:7].upper().startswith(WRITE_STATEMENTS):
+                written.append(sql)
+            return execute(sql, params, many, context)
+
+        token = primary_writes.set(written)
+        try:
+            with connections[DEFAULT_DB_ALIAS].execute_wrapper(detect_writes):
+                response = self.get_response(request)
+        finally:
+            primary_writes.reset(token)
+        if written and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                PIN_COOKIE, '1', max_age=settings.REPLICA_LAG_SECONDS,
+                httponly=True, samesite='Lax')
+        return response
+
+
+def page_cache_version():
+    """Версия кэша страниц; лежит в общем кэше воркеров."""
+    shared = caches[SHARED_CACHE]
+    version = shared.get(PAGE_CACHE_VERSION)
+    if version is None:
+        shared.add(PAGE_CACHE_VERSION, time.time(), None)
+        version = shared.get(PAGE_CACHE_VERSION, time.time())
+    return version
+
+
+class AnonymousPageCacheMiddleware:
+    """Готовые страницы для анонимных посетителей из кэша.
+
+    Стоит до SessionMiddleware: при попадании не разбираются URL, сессия
+    и шаблоны. Запросы с cookie сессии, CSRF, сообщений или закрепления
+    за основной базой идут мимо кэша — их страницы зависят от
+    посетителя. Сохраняются только ответы 200 без Set-Cookie от
+    представлений из PAGE_CACHE['VIEWS']. Ключ, как у UpdateCacheMiddleware,
+    учитывает путь, строку запроса, язык и заголовки из Vary, а в префикс
+    входит версия PAGE_CACHE_VERSION: её меняет любое изменение постов,
+    групп и авторов (posts.caching.bump_feed_versions).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.options = {
+            **DEFAULT_PAGE_CACHE,
+            **getattr(settings, 'PAGE_CACHE', {}),
+        }
+        self.bypass_cookies = {
+            settings.SESSION_COOKIE_NAME,
+            settings.CSRF_COOKIE_NAME,
+            getattr(settings, 'MESSAGE_COOKIE_NAME', 'messages'),
+            PIN_COOKIE,
+        }
+
+    def __call__(self, request):
+        if not self.cacheable_request(request):
+            return self.get_response(request)
+        version = page_cache_version()
+        key_prefix = f'pages:{version}'
+        key = get_cache_key(request, key_prefix, 'GET', cache=cache)
+        response = cache.get(key) if key else None
+        if response is not None:
+            response['X-Page-Cache'] = 'hit'
+            return get_conditional_response(
+                request, etag=response.get('ETag'),
+                last_modified=parse_http_date_safe(
+                    response.get('Last-Modified', '')),
+                response=response)
+        response = self.get_response(request)
+        if request.method == 'GET' and self.cacheable_response(
+                request, response, version):
+            key = learn_cache_key(
+                request, response, self.options['TIMEOUT'], key_prefix,
+                cache=cache)
+            cache.set(key, response, self.options['TIMEOUT'])
+            response['X-Page-Cache'] = 'miss'
+        return response
+
+    def cacheable_request(self, request):
+        return (
+            self.options['ENABLED']
+            and request.method in ('GET', 'HEAD')
+            and not self.bypass_cookies.intersection(request.COOKIES)
+        )
+
+    def cacheable_response(self, request, response, version):
+        match = request.resolver_match
+        if (
+            response.status_code != 200
+            or response.streaming
+            or response.cookies
+            or match is None
+            or match.view_name not in self.options['VIEWS']
+            or 'private' in response.get('Cache-Control', '')
+        ):
+            return False
+        # страница могла быть собрана по ещё не обновлённой реплике
+        return not (
+            settings.DATABASE_REPLICAS
+            and time.time() - version < settings.REPLICA_LAG_SECONDS
+        )
+
+
+def esi_cache_key(request, version):
+    url = md5(request.build_absolute_uri().encode()).hexdigest()
+    return f'esi:{version}:{get_language()}:{url}'
+
+
+def esi_etag(key, user):
+    """ETag собранной страницы: общая копия плюс её пользователь."""
+    return quote_etag(md5(f'{key}:{user.pk}'.encode()).hexdigest())
+
+
+class EsiPageCacheMiddleware(AnonymousPageCacheMiddleware):
+    """Страницы вошедших: общее тело из кэша и свои фрагменты.
+
+    Работает при PAGE_CACHE['ESI'] для запросов с cookie сессии, которые
+    пропустил AnonymousPageCacheMiddleware. Страница рендерится с
+    request.esi: на месте шапки и других {% esi_include %} в ней метки
+    core.esi, поэтому в кэше она одна на всех. При попадании сессия и
+    пользователь загружаются здесь же (при cached_db и кэше users —
+    без запросов к базе), и рендерятся только фрагменты. ETag
+    представления зависит от пользователя, поэтому у собранной страницы
+    он свой — от ключа общей копии и пользователя.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.bypass_cookies = {
+            getattr(settings, 'MESSAGE_COOKIE_NAME', 'messages'),
+            PIN_COOKIE,
+        }
+        self.session_engine = import_module(settings.SESSION_ENGINE)
+
+    def __call__(self, request):
+        if not self.cacheable_request(request):
+            return self.get_response(request)
+        version = page_cache_version()
+        key = esi_cache_key(request, version)
+        page = cache.get(key)
+        if page is not None:
+            return self.cached_page(request, key, page)
+        request.esi = True
+        response = self.get_response(request)
+        if request.method == 'GET' and self.cacheable_response(
+                request, response, version):
+            cache.set(key, {
+                'content': response.content,
+                'headers': [
+                    (header, value) for header, value in response.items()
+                    if header not in PERSONAL_HEADERS
+                ],
+            }, self.options['TIMEOUT'])
+            response['ETag'] = esi_etag(key, request.user)
+            response['X-Page-Cache'] = 'miss'
+        return self.stitch(request, response)
+
+    def cached_page(self, request, key, page):
+        self.load_user(request)
+        response = HttpResponse(page['content'])
+        for header, value in page['headers']:
+            response[header] = value
+        patch_vary_headers(response, ('Cookie',))
+        response['ETag'] = esi_etag(key, request.user)
+        response['X-Page-Cache'] = 'hit'
+        conditional = get_conditional_response(
+            request, etag=response['ETag'],
+            last_modified=parse_http_date_safe(
+                response.get('Last-Modified', '')),
+            response=response)
+        if conditional is not response:
+            return conditional
+        return self.stitch(request, response)
+
+    def cacheable_request(self, request):
+        return (
+            self.options['ESI']
+            and settings.SESSION_COOKIE_NAME in request.COOKIES
+            and super().cacheable_request(request)
+        )
+
+    def load_user(self, request):
+        request.session = self.session_engine.SessionStore(
+            request.COOKIES[settings.SESSION_COOKIE_NAME])
+        request.user = SimpleLazyObject(lambda: get_user(request))
+
+    def stitch(self, request, response):
+        if response.streaming or not response.get(
+                'Content-Type', '').startswith('text/html'):
+            return response
+        response.content = stitch(
+            response.content.decode(response.charset), request)
+        if response.has_header('Content-Length'):
+            response['Content-Length'] = len(response.content)
+        return response
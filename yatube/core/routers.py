@@ -0,0 +1,77 @@
+"""Чтение лент с реплик, запись — только в основную базу.
+
+Представления, обёрнутые в replica_reads, читают с одной из
+settings.DATABASE_REPLICAS. Пользователь, который только что что-то
+записал, получает cookie PIN_COOKIE и до её истечения читает основную
+базу, поэтому сразу видит свой новый пост.
+"""
+import random
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+PIN_COOKIE = 'pin_primary'
+
+replica_enabled = ContextVar('replica_enabled', default=False)
+# записи текущего запроса в основную базу (см. ReplicaPinMiddleware)
+primary_writes = ContextVar('primary_writes', default=None)
+
+
+def reading_from_replica():
+    return replica_enabled.get() and bool(settings.DATABASE_REPLICAS)
+
+
+def replica_may_lag(stamp):
+    """Данные, изменённые в момент stamp, могли ещё не дойти до реплики."""
+    return (
+        reading_from_replica()
+        and time.time() - stamp < settings.REPLICA_LAG_SECONDS
+    )
+
+
+def note_primary_write(description):
+    """Отмечает запись, сделанную за запрос из другого потока.
+
+    Нужна, когда SQL выполняет чужое соединение, как при групповой
+    записи постов: execute_wrapper запроса такую запись не увидит.
+    """
+    written = primary_writes.get()
+    if written is not None:
+        written.append(description)
+
+
+def replica_reads(view):
+    """Отправляет чтения представления на реплику.
+
+    Пользователь, закреплённый за основной базой, читает её как обычно.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if PIN_COOKIE in request.COOKIES:
+            return view(request, *args, **kwargs)
+        token = replica_enabled.set(True)
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            replica_enabled.reset(token)
+    return wrapper
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if reading_from_replica():
+            return random.choice(settings.DATABASE_REPLICAS)
+        return None
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # реплики — копии основной базы, связи между ними допустимы
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
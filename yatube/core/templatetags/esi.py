@@ -0,0 +1,21 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from core.esi import esi_marker
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def esi_include(context, template_name, **params):
+    """Фрагмент, зависящий от пользователя; параметры — только JSON.
+
+    Обычно работает как {% include %} с параметрами, а при request.esi
+    выводит метку для core.esi.stitch.
+    """
+    request = context.get('request')
+    if getattr(request, 'esi', False):
+        return mark_safe(esi_marker(template_name, params))
+    fragment = context.template.engine.get_template(template_name)
+    with context.push(**params):
+        return fragment.render(context)
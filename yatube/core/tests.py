@@ -0,0 +1,304 @@
+import asyncio
+import json
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connections
+from django.test import (Client, RequestFactory, TestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+
+from posts.models import Post
+from yatube.asgi import application
+
+from .cache import SHARED_CACHE
+from .routers import PIN_COOKIE, ReplicaRouter, replica_reads
+
+LRU_CACHES = {
+    'default': {
+        'BACKEND': 'core.cache.backends.LRUCache',
+        'LOCATION': 'test-lru',
+        'OPTIONS': {'MAX_ENTRIES': 3, 'MAX_BYTES': 1000},
+    },
+}
+
+
+@override_settings(CACHES=LRU_CACHES)
+class LRUCacheTests(TestCase):
+    def setUp(self):
+        self.cache = caches['default']
+        self.cache.clear()
+        self.stats = self.cache.stats.as_dict()
+
+    def assertStats(self, **expected):
+        stats = self.cache.stats.as_dict()
+        for name, value in expected.items():
+            self.assertEqual(stats[name] - self.stats[name], value, name)
+
+    def test_evicts_least_recently_used(self):
+        """При переполнении вытесняется давно не читанная запись."""
+        for key in 'abc':
+            self.cache.set(key, key)
+        self.cache.get('a')
+        self.cache.set('d', 'd')
+        self.assertIsNone(self.cache.get('b'))
+        self.assertEqual(self.cache.get_many('acd'), dict(zip('acd', 'acd')))
+        self.assertStats(hits=4, misses=1, evictions=1)
+
+    def test_evicts_by_size(self):
+        """Суммарный размер значений не превышает MAX_BYTES."""
+        self.cache.set('a', 'x' * 400)
+        self.cache.set('b', 'x' * 400)
+        self.cache.set('c', 'x' * 400)
+        self.assertIsNone(self.cache.get('a'))
+        self.assertIsNotNone(self.cache.get('c'))
+        self.assertStats(evictions=1)
+
+
+class SharedCacheTests(TestCase):
+    def test_tests_do_not_touch_site_cache(self):
+        """Тесты пишут в свой shared в памяти, а не в кэш сайта."""
+        self.assertEqual(
+            type(caches[SHARED_CACHE]).__name__, 'LRUCache')
+
+
+class CacheStatsViewTests(TestCase):
+    def test_stats_are_shown_to_staff_only(self):
+        """Статистику кэша видят только сотрудники."""
+        url = reverse('cache_stats')
+        self.assertEqual(self.client.get(url).status_code, 302)
+        self.client.force_login(get_user_model().objects.create_user(
+            username='staff', is_staff=True))
+        self.assertEqual(
+            set(self.client.get(url).json()['default']),
+            {'hits', 'misses', 'evictions'})
+
+
+class RequestTimingMiddlewareTests(TestCase):
+    def test_server_timing_header(self):
+        """В ответе есть время SQL, шаблонов и всего запроса."""
+        timing = self.client.get(reverse('posts:index'))['Server-Timing']
+        self.assertRegex(
+            timing,
+            r'^db;dur=[\d.]+;desc="\d+ queries", '
+            r'tpl;dur=[\d.]+, total;dur=[\d.]+$')
+
+    @override_settings(REQUEST_TIMING={'SLOW_MS': 10 ** 6})
+    def test_log_line(self):
+        """Каждый запрос пишется в лог одной JSON-строкой."""
+        with self.assertLogs('yatube.requests', 'INFO') as logs:
+            self.client.get(reverse('posts:index'))
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(logs.records[0].levelname, 'INFO')
+        self.assertEqual(record['view'], 'posts:index')
+        self.assertEqual(record['status'], 200)
+        self.assertGreater(record['queries'], 0)
+        self.assertNotIn('sql', record)
+
+    @override_settings(REQUEST_TIMING={'SLOW_MS': 0})
+    def test_slow_request_logs_queries(self):
+        """Для медленных запросов в лог попадает список SQL."""
+        with self.assertLogs('yatube.requests', 'WARNING') as logs:
+            self.client.get(reverse('posts:index'))
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(len(record['sql']), record['queries'])
+
+
+class AsgiApplicationTests(TransactionTestCase):
+    def call(self, path, query_string=b''):
+        sent = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            sent.append(message)
+
+        asyncio.run(application({
+            'type': 'http',
+            'http_version': '1.1',
+            'method': 'GET',
+            'path': path,
+            'query_string': query_string,
+            'headers': [(b'host', b'testserver')],
+        }, receive, send))
+        return sent
+
+    def test_http_request(self):
+        """Запрос через ASGI доходит до Django и возвращает ответ."""
+        start, *body = self.call(reverse('about:author'), b'a=1')
+        self.assertEqual(start['status'], 200)
+        self.assertIn(
+            b'text/html; charset=utf-8', dict(start['headers']).values())
+        self.assertIn(b'</html>', b''.join(
+            message['body'] for message in body))
+
+    def test_feed_is_streamed(self):
+        """Потоковая лента уходит клиенту частями, а не одним телом."""
+        author = get_user_model().objects.create_user(username='author')
+        Post.objects.create(author=author, text='Пост')
+        start, *body = self.call(reverse('posts:index_feed'), b'format=json')
+        self.assertEqual(start['status'], 200)
+        self.assertGreater(len(body), 1)
+        self.assertTrue(all(
+            message.get('more_body') for message in body[:-1]))
+        self.assertIn('Пост', json.loads(b''.join(
+            message['body'] for message in body))['items'][0][
+                'content_text'])
+
+
+class SqlitePragmasTests(TestCase):
+    def test_new_connection_is_tuned(self):
+        """Новое соединение с файловой базой получает WAL и прагмы."""
+        with tempfile.TemporaryDirectory() as workdir:
+            default = connections['default']
+            wrapper = type(default)({
+                **default.settings_dict,
+                'NAME': os.path.join(workdir, 'db.sqlite3'),
+            })
+            try:
+                with wrapper.cursor() as cursor:
+                    pragmas = {}
+                    for name in ('journal_mode', 'synchronous',
+                                 'busy_timeout', 'cache_size'):
+                        cursor.execute(f'PRAGMA {name}')
+                        pragmas[name] = cursor.fetchone()[0]
+            finally:
+                wrapper.close()
+        self.assertEqual(pragmas, {
+            'journal_mode': 'wal',
+            # NORMAL
+            'synchronous': 1,
+            'busy_timeout': 5000,
+            'cache_size': -64 * 1024,
+        })
+
+
+@override_settings(DATABASE_REPLICAS=['replica'], REPLICA_LAG_SECONDS=5)
+class ReplicaRoutingTests(TestCase):
+    def test_feed_views_read_from_replica(self):
+        """Внутри replica_reads чтения идут на реплику, запись — нет."""
+        router = ReplicaRouter()
+        routes = []
+
+        @replica_reads
+        def view(request):
+            routes.append(
+                (router.db_for_read(Post), router.db_for_write(Post)))
+
+        view(RequestFactory().get('/'))
+        pinned = RequestFactory().get('/')
+        pinned.COOKIES[PIN_COOKIE] = '1'
+        view(pinned)
+        self.assertEqual(routes, [('replica', 'default'), (None, 'default')])
+        self.assertIsNone(router.db_for_read(Post))
+
+    def test_write_pins_user_to_primary(self):
+        """После записи автор получает cookie и видит свой пост."""
+        user = get_user_model().objects.create_user(username='writer')
+        self.client.force_login(user)
+        response = self.client.post(
+            reverse('posts:post_create'), {'text': 'Свежий пост'})
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], 5)
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Свежий пост')
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+
+class AnonymousPageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = get_user_model().objects.create_user(username='author')
+        Post.objects.create(author=cls.user, text='Первый пост')
+
+    def setUp(self):
+        caches['default'].clear()
+        caches[SHARED_CACHE].clear()
+
+    def test_anonymous_hit_skips_view(self):
+        """Повторная страница анонима отдаётся из кэша без запросов."""
+        url = reverse('posts:index')
+        self.assertEqual(self.client.get(url)['X-Page-Cache'], 'miss')
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'hit')
+        self.assertContains(response, 'Первый пост')
+        response = self.client.get(
+            url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(f'{url}?page=2')
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+
+    def test_post_change_invalidates_pages(self):
+        """Новый пост сбрасывает закэшированные страницы."""
+        url = reverse('posts:index')
+        self.client.get(url)
+        Post.objects.create(author=self.user, text='Второй пост')
+        response = self.client.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+        self.assertContains(response, 'Второй пост')
+
+    def test_other_pages_bypass_cache(self):
+        """Страницы вне PAGE_CACHE['VIEWS'] не кэшируются."""
+        self.client.get(reverse('about:author'))
+        self.assertNotIn(
+            'X-Page-Cache', self.client.get(reverse('about:author')))
+
+    @override_settings(PAGE_CACHE={'VIEWS': ('posts:index',)})
+    def test_logged_in_bypass_cache_without_esi(self):
+        """Без ESI вошедшие пользователи идут мимо кэша."""
+        self.client.force_login(self.user)
+        url = reverse('posts:index')
+        self.client.get(url)
+        response = self.client.get(url)
+        self.assertNotIn('X-Page-Cache', response)
+        self.assertContains(response, 'Выйти')
+
+
+class EsiPageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        User = get_user_model()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+
+    def setUp(self):
+        caches['default'].clear()
+        caches[SHARED_CACHE].clear()
+        caches['users'].clear()
+
+    def test_page_is_shared_and_header_is_personal(self):
+        """Тело страницы общее, а шапка и ссылка автора — свои."""
+        url = reverse('posts:post_detail', args=(self.post.pk,))
+        author = Client()
+        author.force_login(self.author)
+        response = author.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+        self.assertContains(response, 'Редактировать пост')
+        reader = Client()
+        reader.force_login(self.reader)
+        reader.get(reverse('about:author'))
+        with self.assertNumQueries(0):
+            response = reader.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'hit')
+        self.assertContains(response, 'Пользователь:')
+        self.assertContains(response, 'reader')
+        self.assertNotContains(response, 'Редактировать пост')
+        self.assertNotContains(response, '<!--esi')
+
+    def test_personal_validators(self):
+        """Собранная страница отвечает 304 только своему пользователю."""
+        url = reverse('posts:index')
+        self.client.force_login(self.author)
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.client.force_login(self.reader)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Page-Cache'], 'hit')
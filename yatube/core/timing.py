@@ -0,0 +1,51 @@
+"""Сбор времени SQL и шаблонов текущего запроса для RequestTimingMiddleware."""
+import time
+from contextvars import ContextVar
+
+from django.template.backends.django import DjangoTemplates as BaseBackend
+from django.template.backends.django import Template as BaseTemplate
+
+current_stats = ContextVar('request_stats', default=None)
+
+
+class RequestStats:
+    def __init__(self, max_queries=50):
+        self.max_queries = max_queries
+        self.queries = []
+        self.query_count = 0
+        self.sql_ms = 0.0
+        self.template_ms = 0.0
+
+    def record_query(self, execute, sql, params, many, context):
+        """Обёртка для connection.execute_wrapper."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = (time.perf_counter() - started) * 1000
+            self.query_count += 1
+            self.sql_ms += duration
+            if len(self.queries) < self.max_queries:
+                self.queries.append({'sql': sql, 'ms': round(duration, 3)})
+
+
+class Template(BaseTemplate):
+    def render(self, context=None, request=None):
+        stats = current_stats.get()
+        if stats is None:
+            return super().render(context, request)
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            stats.template_ms += (time.perf_counter() - started) * 1000
+
+
+class DjangoTemplates(BaseBackend):
+    """Бэкенд шаблонов Django, замеряющий время рендеринга."""
+
+    def from_string(self, template_code):
+        return Template(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        return Template(super().get_template(template_name).template, self)
@@ -0,0 +1,21 @@
+from functools import lru_cache
+
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.urls import get_script_prefix, reverse
+
+
+@lru_cache(maxsize=8192)
+def _cached_reverse(script_prefix, viewname, args):
+    return reverse(viewname, args=args)
+
+
+def cached_reverse(viewname, *args):
+    """reverse() с запоминанием для ссылок, повторяющихся в лентах."""
+    return _cached_reverse(get_script_prefix(), viewname, args)
+
+
+@receiver(setting_changed)
+def clear_reverse_cache(setting, **kwargs):
+    if setting == 'ROOT_URLCONF':
+        _cached_reverse.cache_clear()
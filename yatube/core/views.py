@@ -0,0 +1,9 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
+
+from .cache import backends
+
+
+@staff_member_required
+def cache_stats(request):
+    return JsonResponse(backends.cache_stats())
@@ -0,0 +1,18 @@
+from django.contrib import admin
+
+from .models import Job
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'kind',
+        'status',
+        'attempts',
+        'run_at',
+    )
+    list_filter = ('status', 'kind')
+    readonly_fields = ('created_at',)
+
+
+admin.site.register(Job, JobAdmin)
@@ -0,0 +1,49 @@
+import multiprocessing
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from jobs import worker
+
+
+def work(batch_size):
+    # соединения родителя не переживают fork
+    connections.close_all()
+    worker.work(batch_size)
+
+
+class Command(BaseCommand):
+    help = 'Запускает пул процессов, выполняющих фоновые задачи.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=2,
+            help='Сколько процессов-воркеров запустить.')
+        parser.add_argument(
+            '--batch-size', type=int,
+            help='Сколько задач захватывать за раз (TASKS["BATCH_SIZE"]).')
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить накопившиеся задачи в этом процессе и выйти.')
+
+    def handle(self, *args, **options):
+        if options['once']:
+            processed = worker.work(options['batch_size'], once=True)
+            self.stdout.write(self.style.SUCCESS(
+                f'Выполнено задач: {processed}'))
+            return
+        connections.close_all()
+        processes = [
+            multiprocessing.Process(
+                target=work, args=(options['batch_size'],), daemon=True)
+            for _ in range(options['processes'])
+        ]
+        for process in processes:
+            process.start()
+        self.stdout.write(f'Запущено воркеров: {len(processes)}')
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            for process in processes:
+                process.terminate()
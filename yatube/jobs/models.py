@@ -0,0 +1,41 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """Отложенный вызов задачи из jobs.registry."""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'Ожидает'),
+        (RUNNING, 'Выполняется'),
+        (FAILED, 'Ошибка'),
+    )
+
+    kind = models.CharField(max_length=100, verbose_name='Задача')
+    payload = models.TextField(default='{}', verbose_name='Аргументы (JSON)')
+    status = models.CharField(
+        max_length=10, choices=STATUSES, default=PENDING,
+        verbose_name='Состояние')
+    attempts = models.PositiveSmallIntegerField(
+        default=0, verbose_name='Попыток')
+    run_at = models.DateTimeField(
+        default=timezone.now, verbose_name='Выполнить после')
+    locked_until = models.DateTimeField(
+        null=True, blank=True, verbose_name='Занята до')
+    worker = models.CharField(max_length=32, blank=True)
+    last_error = models.TextField(blank=True, verbose_name='Последняя ошибка')
+    created_at = models.DateTimeField(
+        auto_now_add=True, verbose_name='Создана')
+
+    class Meta:
+        verbose_name = 'Задача'
+        verbose_name_plural = 'Задачи'
+        ordering = ('id',)
+        indexes = (
+            models.Index(fields=('status', 'run_at'), name='job_ready_idx'),
+        )
+
+    def __str__(self):
+        return f'{self.kind} #{self.pk}'
@@ -0,0 +1,68 @@
+"""Регистрация и постановка фоновых задач.
+
+Задача — функция, объявленная через @task в модуле tasks.py приложения.
+enqueue() записывает вызов в таблицу Job в текущей транзакции, так что
+задача появится только вместе с данными, которые её породили. При
+settings.TASKS_SYNC задача выполняется в этом же процессе после коммита
+транзакции — для разработки без воркеров. Её ошибка только пишется в
+лог: откатывать данные, которые уже сохранены, она не должна.
+"""
+import json
+import logging
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Job
+
+logger = logging.getLogger('yatube.jobs')
+
+TASKS = {}
+
+
+class Task:
+    def __init__(self, name, func, batch=False, max_attempts=None):
+        self.name = name
+        self.func = func
+        self.batch = batch
+        self.max_attempts = max_attempts or settings.TASKS['MAX_ATTEMPTS']
+
+    def run(self, payloads):
+        """Пакетная задача получает список аргументов, обычная — по одному."""
+        if self.batch:
+            self.func(payloads)
+            return
+        for payload in payloads:
+            self.func(**payload)
+
+
+def task(name, batch=False, max_attempts=None):
+    def register(func):
+        TASKS[name] = Task(name, func, batch, max_attempts)
+        return func
+    return register
+
+
+def enqueue(name, **payload):
+    enqueue_many(name, [payload])
+
+
+def enqueue_many(name, payloads):
+    """Ставит в очередь несколько вызовов задачи одним INSERT."""
+    if name not in TASKS:
+        raise KeyError(f'Неизвестная задача: {name}')
+    if not payloads:
+        return
+    if settings.TASKS_SYNC:
+        transaction.on_commit(partial(run_now, TASKS[name], payloads))
+        return
+    Job.objects.bulk_create(
+        Job(kind=name, payload=json.dumps(payload)) for payload in payloads)
+
+
+def run_now(task, payloads):
+    try:
+        task.run(payloads)
+    except Exception:
+        logger.exception('Задача %s завершилась ошибкой', task.name)
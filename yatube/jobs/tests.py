@@ -0,0 +1,126 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from posts.models import Post
+
+from . import worker
+from .models import Job
+from .registry import TASKS, enqueue, task
+
+User = get_user_model()
+
+MANAGERS = [('Модератор', 'moderator@example.com')]
+
+CALLS = []
+
+
+@task('tests.echo')
+def echo(value):
+    if value == 'boom':
+        raise RuntimeError(value)
+    CALLS.append(value)
+
+
+@task('tests.collect', batch=True, max_attempts=1)
+def collect(payloads):
+    CALLS.append([payload['value'] for payload in payloads])
+
+
+@override_settings(TASKS_SYNC=False)
+class JobQueueTests(TestCase):
+    def setUp(self):
+        CALLS.clear()
+
+    def test_enqueue_defers_until_worker(self):
+        """Проверка: без TASKS_SYNC задача только записывается в очередь."""
+        enqueue('tests.echo', value='a')
+        self.assertEqual(CALLS, [])
+        self.assertEqual(worker.work(once=True), 1)
+        self.assertEqual(CALLS, ['a'])
+        self.assertFalse(Job.objects.exists())
+
+    def test_batch_task_runs_once_per_claim(self):
+        """Проверка: пакетная задача получает все аргументы одним вызовом."""
+        for value in 'abc':
+            enqueue('tests.collect', value=value)
+        worker.work(once=True)
+        self.assertEqual(CALLS, [['a', 'b', 'c']])
+
+    def test_failed_job_is_retried_later(self):
+        """Проверка: упавшая задача откладывается, а после попыток — FAILED."""
+        enqueue('tests.echo', value='boom')
+        worker.work(once=True)
+        job = Job.objects.get()
+        self.assertEqual(job.status, Job.PENDING)
+        self.assertEqual(job.attempts, 1)
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn('RuntimeError', job.last_error)
+        Job.objects.update(
+            attempts=TASKS['tests.echo'].max_attempts - 1,
+            run_at=timezone.now())
+        worker.work(once=True)
+        self.assertEqual(Job.objects.get().status, Job.FAILED)
+        self.assertEqual(worker.work(once=True), 0)
+
+    def test_expired_lease_is_claimed_again(self):
+        """Проверка: задачу упавшего воркера забирают после аренды."""
+        enqueue('tests.echo', value='a')
+        self.assertEqual(len(worker.claim(10)), 1)
+        self.assertEqual(worker.claim(10), [])
+        Job.objects.update(locked_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(len(worker.claim(10)), 1)
+
+    @override_settings(MANAGERS=MANAGERS)
+    def test_new_post_notifies_managers_in_one_digest(self):
+        """Проверка: новые посты попадают модератору одним письмом."""
+        user = User.objects.create_user(username='writer')
+        Post.objects.create(author=user, text='Первый')
+        Post.objects.create(author=user, text='Второй')
+        self.assertEqual(len(mail.outbox), 0)
+        worker.work(once=True)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn('Первый', mail.outbox[0].body)
+        self.assertIn('Второй', mail.outbox[0].body)
+
+    def test_no_digest_without_managers(self):
+        """Проверка: без MANAGERS письмо о новых постах не ставится."""
+        with self.settings(MANAGERS=[]):
+            Post.objects.create(
+                author=User.objects.create_user(username='writer'),
+                text='Пост')
+        self.assertFalse(Job.objects.exists())
+
+
+@override_settings(TASKS_SYNC=True)
+class SyncJobTests(TransactionTestCase):
+    def setUp(self):
+        CALLS.clear()
+
+    def test_sync_mode_runs_after_commit(self):
+        """Проверка: с TASKS_SYNC задача выполняется после коммита."""
+        with transaction.atomic():
+            enqueue('tests.echo', value='now')
+            self.assertEqual(CALLS, [])
+        self.assertEqual(CALLS, ['now'])
+        self.assertFalse(Job.objects.exists())
+
+    def test_sync_error_is_logged(self):
+        """Проверка: ошибка задачи пишется в лог и не доходит до вызова."""
+        with self.assertLogs('yatube.jobs', 'ERROR'):
+            enqueue('tests.echo', value='boom')
+
+    @override_settings(
+        MANAGERS=MANAGERS,
+        EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+        EMAIL_HOST='127.0.0.1', EMAIL_PORT=1)
+    def test_mail_failure_keeps_post(self):
+        """Проверка: недоступная почта не откатывает новый пост."""
+        user = User.objects.create_user(username='writer')
+        with self.assertLogs('yatube.jobs', 'ERROR'):
+            Post.objects.create(author=user, text='Пост')
+        self.assertTrue(Post.objects.filter(text='Пост').exists())
@@ -0,0 +1,88 @@
+"""Выполнение задач из таблицы Job.
+
+Воркер захватывает пачку готовых задач одним UPDATE с арендой до
+locked_until: задачи упавшего воркера по истечении аренды заберёт
+другой. Задачи одного вида выполняются вместе, пакетные — одним вызовом.
+Успешные задачи удаляются, упавшие повторяются с экспоненциальной
+задержкой, пока не кончатся попытки.
+"""
+import json
+import time
+import traceback
+from datetime import timedelta
+from itertools import groupby
+from operator import attrgetter
+from uuid import uuid4
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Job
+from .registry import TASKS
+
+
+def ready(now):
+    return Q(status=Job.PENDING, run_at__lte=now) | Q(
+        status=Job.RUNNING, locked_until__lt=now)
+
+
+def claim(batch_size):
+    now = timezone.now()
+    worker = uuid4().hex
+    lease = timedelta(seconds=settings.TASKS['LEASE_SECONDS'])
+    ids = Job.objects.filter(ready(now)).values('id')[:batch_size]
+    # условие повторяется снаружи: строку мог забрать другой воркер
+    Job.objects.filter(ready(now), pk__in=ids).update(
+        status=Job.RUNNING, locked_until=now + lease, worker=worker)
+    return list(Job.objects.filter(worker=worker, status=Job.RUNNING))
+
+
+def fail(jobs, max_attempts, error):
+    now = timezone.now()
+    for job in jobs:
+        job.attempts += 1
+        job.last_error = error
+        job.worker = ''
+        job.locked_until = None
+        if job.attempts >= max_attempts:
+            job.status = Job.FAILED
+        else:
+            job.status = Job.PENDING
+            delay = settings.TASKS['RETRY_DELAY'] * 2 ** (job.attempts - 1)
+            job.run_at = now + timedelta(seconds=delay)
+        job.save(update_fields=(
+            'attempts', 'last_error', 'worker', 'locked_until', 'status',
+            'run_at'))
+
+
+def run_jobs(jobs):
+    for kind, group in groupby(
+            sorted(jobs, key=attrgetter('kind', 'id')), attrgetter('kind')):
+        group = list(group)
+        task = TASKS.get(kind)
+        if task is None:
+            fail(group, 1, f'Неизвестная задача: {kind}')
+            continue
+        for chunk in [group] if task.batch else [[job] for job in group]:
+            try:
+                task.run([json.loads(job.payload) for job in chunk])
+            except Exception:
+                fail(chunk, task.max_attempts, traceback.format_exc())
+            else:
+                Job.objects.filter(pk__in=[job.pk for job in chunk]).delete()
+
+
+def work(batch_size=None, once=False):
+    """Цикл воркера; с once=True — до опустошения очереди."""
+    batch_size = batch_size or settings.TASKS['BATCH_SIZE']
+    processed = 0
+    while True:
+        jobs = claim(batch_size)
+        if jobs:
+            run_jobs(jobs)
+            processed += len(jobs)
+        elif once:
+            return processed
+        else:
+            time.sleep(settings.TASKS['POLL_SECONDS'])
@@ -0,0 +1,387 @@
+"""Нагрузочные замеры страниц постов через тестовый клиент Django.
+
+Сценарий — функция, которая получает клиента и данные замера и делает
+один запрос. Для каждого сценария собираются p50/p95 времени ответа и
+количество SQL-запросов; результат можно сравнить с сохранённым
+эталоном, чтобы заметить регрессию.
+"""
+import json
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import OperationalError, connection, connections
+from django.template import Context as TemplateContext
+from django.template import Engine
+from django.template.backends.django import get_installed_libraries
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from faker import Faker
+
+from core.utils import cached_reverse
+
+from .constants import MAX_POSTS_COUNT
+from .models import Group, Post, PostCounter, User
+from .writer import PostWriter
+
+# допустимое ухудшение p95 относительно эталона
+TOLERANCE = 0.2
+# SQLite без настройки: журнал отката и fsync на каждую транзакцию
+SQLITE_DEFAULT_PRAGMAS = {'journal_mode': 'DELETE', 'synchronous': 'FULL'}
+SCENARIOS = {}
+
+
+def scenario(name):
+    def register(func):
+        SCENARIOS[name] = func
+        return func
+    return register
+
+
+def seed(users=100, groups=20, posts=10000, batch_size=2000, random_seed=0):
+    """Заполняет базу синтетическими авторами, группами и постами."""
+    fake = Faker('ru_RU')
+    Faker.seed(random_seed)
+    generator = random.Random(random_seed)
+    User.objects.bulk_create(
+        User(
+            username=f'user{i}',
+            first_name=fake.first_name(),
+            last_name=fake.last_name(),
+        ) for i in range(users))
+    Group.objects.bulk_create(
+        Group(
+            title=fake.sentence(nb_words=3),
+            slug=f'group{i}',
+            description=fake.paragraph(),
+        ) for i in range(groups))
+    author_ids = list(User.objects.values_list('id', flat=True))
+    group_ids = list(Group.objects.values_list('id', flat=True)) + [None]
+    for start in range(0, posts, batch_size):
+        Post.objects.bulk_create(
+            Post(
+                text=fake.paragraph(nb_sentences=5),
+                author_id=generator.choice(author_ids),
+                group_id=generator.choice(group_ids),
+            ) for _ in range(min(batch_size, posts - start)))
+
+
+class Context:
+    """Данные, общие для сценариев одного замера."""
+
+    def __init__(self, random_seed=0):
+        self.random = random.Random(random_seed)
+        self.author = User.objects.order_by('id').first()
+        self.author.set_password('benchmark')
+        self.author.save()
+        self.group = Group.objects.order_by('id').first()
+        self.post_ids = list(Post.objects.values_list('id', flat=True))
+        self.own_post_ids = list(
+            self.author.posts.values_list('id', flat=True))
+        self.guest = Client()
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def page(self):
+        return self.random.choice((1, 2, 3, 10, 100))
+
+
+@scenario('index')
+def index(ctx):
+    return ctx.guest.get(reverse('posts:index'), {'page': ctx.page()})
+
+
+@scenario('group_posts')
+def group_posts(ctx):
+    return ctx.guest.get(
+        reverse('posts:group_list', args=(ctx.group.slug,)),
+        {'page': ctx.page()})
+
+
+@scenario('profile')
+def profile(ctx):
+    return ctx.guest.get(
+        reverse('posts:profile', args=(ctx.author.username,)),
+        {'page': ctx.page()})
+
+
+@scenario('post_detail')
+def post_detail(ctx):
+    return ctx.guest.get(
+        reverse('posts:post_detail', args=(ctx.random.choice(ctx.post_ids),)))
+
+
+@scenario('user_index')
+def user_index(ctx):
+    return ctx.client.get(reverse('posts:index'), {'page': ctx.page()})
+
+
+@scenario('user_post_detail')
+def user_post_detail(ctx):
+    return ctx.client.get(
+        reverse('posts:post_detail', args=(ctx.random.choice(ctx.post_ids),)))
+
+
+@scenario('post_create')
+def post_create(ctx):
+    return ctx.client.post(
+        reverse('posts:post_create'),
+        {'text': 'Пост из нагрузочного теста', 'group': ctx.group.id})
+
+
+@scenario('post_edit')
+def post_edit(ctx):
+    return ctx.client.post(
+        reverse(
+            'posts:post_edit', args=(ctx.random.choice(ctx.own_post_ids),)),
+        {'text': 'Исправленный пост', 'group': ctx.group.id})
+
+
+@scenario('api_index')
+def api_index(ctx):
+    return ctx.guest.get(reverse('api:posts'))
+
+
+@scenario('api_group_posts')
+def api_group_posts(ctx):
+    return ctx.guest.get(reverse('api:group', args=(ctx.group.slug,)))
+
+
+@scenario('api_profile')
+def api_profile(ctx):
+    return ctx.guest.get(reverse('api:profile', args=(ctx.author.username,)))
+
+
+@scenario('api_post_detail')
+def api_post_detail(ctx):
+    return ctx.guest.get(
+        reverse('api:post', args=(ctx.random.choice(ctx.post_ids),)))
+
+
+def percentile(values, share):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(share * len(values)))]
+
+
+def measure(func, ctx, requests=50, warm_cache=False):
+    timings, queries = [], []
+    for _ in range(requests):
+        if not warm_cache:
+            cache.clear()
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = func(ctx)
+            timings.append((time.perf_counter() - started) * 1000)
+        if response.status_code >= 400:
+            raise RuntimeError(f'{func.__name__}: {response.status_code}')
+        queries.append(len(captured))
+    return {
+        'requests': requests,
+        'p50_ms': round(percentile(timings, 0.5), 3),
+        'p95_ms': round(percentile(timings, 0.95), 3),
+        'mean_ms': round(sum(timings) / len(timings), 3),
+        'rps': round(len(timings) * 1000 / sum(timings), 1),
+        'queries': max(queries),
+    }
+
+
+def api_speedup(results):
+    """Во сколько раз JSON API быстрее соответствующей HTML-страницы."""
+    speedup = {}
+    for name, result in results.items():
+        if not name.startswith('api_'):
+            continue
+        html = results.get(name[len('api_'):])
+        if html:
+            speedup[name] = round(result['rps'] / html['rps'], 2)
+    return speedup
+
+
+def run(names=None, requests=50, warm_cache=False, random_seed=0):
+    ctx = Context(random_seed)
+    return {
+        name: measure(SCENARIOS[name], ctx, requests, warm_cache)
+        for name in names or SCENARIOS
+    }
+
+
+def regressions(results, baseline, tolerance=TOLERANCE):
+    """Сценарии, которые стали медленнее эталона или делают больше запросов."""
+    found = {}
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        problems = []
+        if result['p95_ms'] > expected['p95_ms'] * (1 + tolerance):
+            problems.append(
+                f"p95 {result['p95_ms']} мс > {expected['p95_ms']} мс")
+        if result['queries'] > expected['queries']:
+            problems.append(
+                f"запросов {result['queries']} > {expected['queries']}")
+        if problems:
+            found[name] = problems
+    return found
+
+
+def timed(func, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return round((time.perf_counter() - started) * 1000 / repeat, 4)
+
+
+def templates(repeat=200):
+    """Микрозамер рендеринга страницы ленты и построения ссылок.
+
+    Сравнивает загрузку шаблонов с разбором на каждый рендер и через
+    cached.Loader, а также reverse() и cached_reverse() для ссылок поста.
+    """
+    loaders = [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]
+    engine = settings.TEMPLATES[0]
+    options = {
+        'dirs': engine['DIRS'],
+        'libraries': get_installed_libraries(),
+    }
+    posts = list(Post.objects.for_feed()[:MAX_POSTS_COUNT])
+    context = {
+        'page_obj': posts,
+        # фрагментный кэш не должен отдавать готовый HTML
+        'feed_cache_timeout': 0,
+    }
+
+    def render(engine):
+        return lambda: engine.get_template('posts/index.html').render(
+            TemplateContext(context))
+
+    post = posts[0]
+    return {
+        'render_ms': timed(render(Engine(loaders=loaders, **options)), repeat),
+        'render_cached_loader_ms': timed(render(Engine(
+            loaders=[('django.template.loaders.cached.Loader', loaders)],
+            **options)), repeat),
+        'reverse_ms': timed(lambda: reverse(
+            'posts:post_detail', args=(post.pk,)), repeat),
+        'cached_reverse_ms': timed(lambda: cached_reverse(
+            'posts:post_detail', post.pk), repeat),
+    }
+
+
+def load_worker(action, stop, generator, timings, errors, lock):
+    """Выполняет action до момента stop в своём соединении с базой."""
+    spent, failed = [], 0
+    try:
+        while time.monotonic() < stop:
+            started = time.perf_counter()
+            try:
+                action(generator)
+            except OperationalError:
+                failed += 1
+                continue
+            spent.append((time.perf_counter() - started) * 1000)
+    finally:
+        connections.close_all()
+    with lock:
+        timings.extend(spent)
+        errors.append(failed)
+
+
+def concurrency_profile(readers, writers, duration, random_seed=0,
+                        save=Post.save):
+    """Читатели ленты и авторы постов в параллельных потоках.
+
+    Каждый поток работает через своё соединение с базой. Читатель
+    открывает первую страницу главной ленты со счётчиком постов, писатель
+    сохраняет новый пост через save — как post_create. Ошибки
+    «database is locked» считаются отдельно.
+    """
+    author_ids = list(User.objects.values_list('id', flat=True))
+    group_ids = list(Group.objects.values_list('id', flat=True)) + [None]
+    connection.close()
+
+    def read(generator):
+        PostCounter.objects.value(PostCounter.TOTAL)
+        list(Post.objects.for_feed()[:MAX_POSTS_COUNT])
+
+    def write(generator):
+        save(Post(
+            text='Пост из нагрузочного теста',
+            author_id=generator.choice(author_ids),
+            group_id=generator.choice(group_ids)))
+
+    lock = threading.Lock()
+    timings = {'read': [], 'write': []}
+    errors = []
+    stop = time.monotonic() + duration
+    threads = [
+        threading.Thread(target=load_worker, args=(
+            action, stop, random.Random(f'{random_seed}-{kind}-{number}'),
+            timings[kind], errors, lock))
+        for kind, action, count in (
+            ('read', read, readers), ('write', write, writers))
+        for number in range(count)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    result = {'errors': sum(errors)}
+    for kind, spent in timings.items():
+        result[f'{kind}s_per_s'] = round(len(spent) / duration, 1)
+        result[f'{kind}_p95_ms'] = (
+            round(percentile(spent, 0.95), 3) if spent else None)
+    return result
+
+
+def concurrency(readers=4, writers=2, duration=5.0, random_seed=0):
+    """Сравнивает SQLite «из коробки» и прагмы из settings.SQLITE_PRAGMAS.
+
+    Имеет смысл только на файловой базе: у базы в памяти нет WAL.
+    """
+    results = {}
+    profiles = (
+        ('default', SQLITE_DEFAULT_PRAGMAS),
+        ('tuned', settings.SQLITE_PRAGMAS),
+    )
+    for name, pragmas in profiles:
+        with override_settings(SQLITE_PRAGMAS=pragmas):
+            results[name] = concurrency_profile(
+                readers, writers, duration, random_seed)
+    connection.close()
+    return results
+
+
+def group_commit(writers=8, duration=5.0, random_seed=0):
+    """Параллельная запись постов: по транзакции на пост и пачками.
+
+    Для пачек дополнительно возвращает их средний и наибольший размер и
+    время коммита из PostWriter.stats.
+    """
+    writer = PostWriter()
+    results = {}
+    modes = (
+        ('per_post', Post.save),
+        ('grouped', writer.save),
+    )
+    for name, save in modes:
+        results[name] = concurrency_profile(
+            0, writers, duration, random_seed, save)
+    results['grouped'].update(writer.stats.as_dict())
+    connection.close()
+    return results
+
+
+def dump(report, path):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(report, file, ensure_ascii=False, indent=2)
+
+
+def load(path):
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
@@ -0,0 +1,93 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from core.cache import SHARED_CACHE
+from core.middleware import PAGE_CACHE_VERSION
+from core.routers import replica_may_lag
+
+from .constants import FEED_CACHE_TIMEOUT
+
+INDEX_FEED = 'feed:index'
+# метка изменённого поста в кэше вместо самого поста
+STALE_POST = 'stale'
+
+
+def group_feed(group_id):
+    return f'feed:group:{group_id}'
+
+
+def author_feed(author_id):
+    return f'feed:author:{author_id}'
+
+
+def post_key(post_id):
+    return f'post:{post_id}'
+
+
+def post_detail_key(post_id):
+    return f'post_detail:{post_id}'
+
+
+def forget_posts(post_ids):
+    """Сбрасывает посты в кэше PostLoader.
+
+    Вместо удаления ставится метка: пока она жива (время отставания
+    реплик), загрузчик читает пост из базы, но не кладёт в кэш, чтобы
+    не сохранить старую версию с реплики или из параллельного запроса.
+    """
+    caches[SHARED_CACHE].set_many(
+        {post_key(post_id): STALE_POST for post_id in post_ids},
+        settings.REPLICA_LAG_SECONDS)
+
+
+def post_feeds(post, *group_ids):
+    """Ленты, в которых виден пост (и в которых он был до переноса)."""
+    feeds = {INDEX_FEED, author_feed(post.author_id)}
+    for group_id in (post.group_id, *group_ids):
+        if group_id is not None:
+            feeds.add(group_feed(group_id))
+    return feeds
+
+
+def feed_version(feed):
+    """Версия ленты: момент её последнего изменения.
+
+    Если версия вытеснена из кэша, отсчёт начинается заново с текущего
+    момента, поэтому старые фрагменты под новую версию не попадут.
+    Версии лежат в общем кэше: изменение в одном воркере видят все.
+    """
+    shared = caches[SHARED_CACHE]
+    version = shared.get(feed)
+    if version is None:
+        shared.add(feed, time.time(), None)
+        version = shared.get(feed, time.time())
+    return version
+
+
+def bump_feed_versions(feeds):
+    """Отмечает изменение лент; заодно сбрасывает страницы для анонимов."""
+    now = time.time()
+    versions = {feed: now for feed in feeds}
+    versions[PAGE_CACHE_VERSION] = now
+    caches[SHARED_CACHE].set_many(versions, None)
+
+
+def post_stamps(post):
+    """Моменты изменений, от которых зависит страница поста."""
+    return (
+        post.updated_at.timestamp(),
+        feed_version(author_feed(post.author_id)),
+        feed_version(group_feed(post.group_id)) if post.group_id else 0,
+    )
+
+
+def feed_cache_context(feed):
+    version = feed_version(feed)
+    return {
+        'feed_version': version,
+        # фрагмент с отстающей реплики не должен попасть в кэш надолго
+        'feed_cache_timeout': (
+            0 if replica_may_lag(version) else FEED_CACHE_TIMEOUT),
+    }
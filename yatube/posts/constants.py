@@ -7,3 +7,26 @@ PROFILE_TEMPLATE = 'posts/profile.html'
 POST_DETAIL_TEMPLATE = 'posts/post_detail.html'
 POST_EDIT_TEMPLATE = 'posts/create_post.html'
 CREATE_POST_TEMPLATE = 'posts/create_post.html'
+SEARCH_TEMPLATE = 'posts/search.html'
+
+# параметр запроса курсорной пагинации и направления курсора
+CURSOR_PARAM = 'cursor'
+CURSOR_NEXT = 'n'
+CURSOR_PREVIOUS = 'p'
+# id в курсоре не больше INTEGER SQLite, иначе запрос не выполнить
+MAX_CURSOR_ID = 2 ** 63 - 1
+
+# время жизни кэша фрагментов лент; актуальность обеспечивают версии лент
+FEED_CACHE_TIMEOUT = 60 * 60 * 24
+# время жизни поста в кэше PostLoader; при изменениях пост сбрасывается
+POST_CACHE_TIMEOUT = 60 * 60
+
+# сколько первых страниц главной ленты отдаётся из таблицы TimelineEntry
+TIMELINE_PAGES = 5
+TIMELINE_SIZE = MAX_POSTS_COUNT * TIMELINE_PAGES
+
+# ленты для агрегаторов: число постов, размер пачки iterator() и параметр
+# формата (?format=atom|json)
+FEED_POSTS_COUNT = 50
+FEED_CHUNK_SIZE = 100
+FEED_FORMAT_PARAM = 'format'
@@ -0,0 +1,115 @@
+"""Ленты постов в форматах Atom и JSON Feed для агрегаторов.
+
+Документ отдаётся по частям через StreamingHttpResponse: посты читаются
+iterator() и сериализуются по одному, поэтому память не зависит от длины
+ленты.
+"""
+import json
+from datetime import datetime, timezone
+from io import StringIO
+
+from django.http import StreamingHttpResponse
+from django.utils.text import Truncator
+from django.utils.xmlutils import SimplerXMLGenerator
+
+from .constants import FEED_CHUNK_SIZE, FEED_FORMAT_PARAM, FEED_POSTS_COUNT
+
+ATOM_CONTENT_TYPE = 'application/atom+xml; charset=utf-8'
+JSON_CONTENT_TYPE = 'application/feed+json; charset=utf-8'
+JSON_FEED_VERSION = 'https://jsonfeed.org/version/1.1'
+TITLE_LENGTH = 50
+
+
+class Feed:
+    """Заголовок ленты и посты для сериализации."""
+
+    def __init__(self, request, title, link, posts, updated):
+        self.request = request
+        self.title = title
+        self.link = request.build_absolute_uri(link)
+        self.url = request.build_absolute_uri()
+        # база выбирается сейчас: посты читаются уже после выхода из view,
+        # когда маршрутизация на реплику для запроса закончилась
+        self.posts = posts.using(posts.db)[:FEED_POSTS_COUNT].iterator(
+            chunk_size=FEED_CHUNK_SIZE)
+        self.updated = datetime.fromtimestamp(updated, timezone.utc)
+
+    def absolute(self, path):
+        return self.request.build_absolute_uri(path)
+
+
+def atom(feed):
+    buffer = StringIO()
+    xml = SimplerXMLGenerator(buffer, 'utf-8')
+    xml.startDocument()
+    xml.startElement('feed', {'xmlns': 'http://www.w3.org/2005/Atom'})
+    xml.addQuickElement('title', feed.title)
+    xml.addQuickElement('link', '', {'rel': 'alternate', 'href': feed.link})
+    xml.addQuickElement('link', '', {'rel': 'self', 'href': feed.url})
+    xml.addQuickElement('id', feed.url)
+    xml.addQuickElement('updated', feed.updated.isoformat())
+    for post in feed.posts:
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        url = feed.absolute(post.get_absolute_url())
+        xml.startElement('entry', {})
+        xml.addQuickElement(
+            'title', Truncator(post.text).chars(TITLE_LENGTH))
+        xml.addQuickElement('link', '', {'rel': 'alternate', 'href': url})
+        xml.addQuickElement('id', url)
+        xml.addQuickElement('published', post.pub_date.isoformat())
+        xml.addQuickElement('updated', post.updated_at.isoformat())
+        xml.startElement('author', {})
+        xml.addQuickElement('name', post.author.get_full_name()
+                            or post.author.username)
+        xml.addQuickElement('uri', feed.absolute(post.get_author_url()))
+        xml.endElement('author')
+        if post.group:
+            xml.addQuickElement('category', '', {
+                'term': post.group.slug, 'label': post.group.title})
+        xml.addQuickElement('content', post.text, {'type': 'text'})
+        xml.endElement('entry')
+    xml.endElement('feed')
+    yield buffer.getvalue()
+
+
+def json_feed(feed):
+    header = json.dumps({
+        'version': JSON_FEED_VERSION,
+        'title': feed.title,
+        'home_page_url': feed.link,
+        'feed_url': feed.url,
+    }, ensure_ascii=False)
+    yield header[:-1] + ', "items": ['
+    separator = ''
+    for post in feed.posts:
+        item = {
+            'id': str(post.pk),
+            'url': feed.absolute(post.get_absolute_url()),
+            'content_text': post.text,
+            'date_published': post.pub_date.isoformat(),
+            'date_modified': post.updated_at.isoformat(),
+            'authors': [{
+                'name': post.author.get_full_name() or post.author.username,
+                'url': feed.absolute(post.get_author_url()),
+            }],
+        }
+        if post.group:
+            item['tags'] = [post.group.title]
+        yield separator + json.dumps(item, ensure_ascii=False)
+        separator = ', '
+    yield ']}'
+
+
+FORMATS = {
+    'atom': (atom, ATOM_CONTENT_TYPE),
+    'json': (json_feed, JSON_CONTENT_TYPE),
+}
+
+
+def feed_response(feed):
+    """Потоковый ответ в формате из ?format= (по умолчанию Atom)."""
+    serialize, content_type = FORMATS.get(
+        feed.request.GET.get(FEED_FORMAT_PARAM), FORMATS['atom'])
+    return StreamingHttpResponse(serialize(feed), content_type=content_type)
@@ -0,0 +1,105 @@
+"""Загрузка постов по id с автором и группой.
+
+PostLoader берёт пост из памяти текущего запроса, затем из кэша и лишь
+оставшиеся id читает из базы одним запросом. Посты лежат в общем кэше
+воркеров, изменённые сбрасываются через caching.forget_posts.
+"""
+import time
+
+from django.core.cache import cache, caches
+from django.db.models import CharField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Concat
+
+from core.cache import SHARED_CACHE
+from core.routers import replica_may_lag
+
+from .caching import STALE_POST, post_detail_key, post_key, post_stamps
+from .constants import POST_CACHE_TIMEOUT
+from .models import Post, PostCounter
+
+
+class PostLoader:
+    def __init__(self):
+        # id -> пост или None, если поста нет
+        self.memo = {}
+
+    @classmethod
+    def for_request(cls, request):
+        """Один загрузчик на запрос: повторные id не читаются заново."""
+        if not hasattr(request, '_post_loader'):
+            request._post_loader = cls()
+        return request._post_loader
+
+    def load(self, post_id):
+        posts = self.load_many([post_id])
+        return posts[0] if posts else None
+
+    def load_many(self, post_ids):
+        """Посты в порядке post_ids; несуществующие пропускаются."""
+        post_ids = [int(post_id) for post_id in post_ids]
+        missing = [
+            post_id for post_id in dict.fromkeys(post_ids)
+            if post_id not in self.memo
+        ]
+        if missing:
+            self.memo.update(self.fetch(missing))
+        return [
+            self.memo[post_id] for post_id in post_ids
+            if self.memo[post_id] is not None
+        ]
+
+    def fetch(self, post_ids):
+        keys = {post_id: post_key(post_id) for post_id in post_ids}
+        shared = caches[SHARED_CACHE]
+        cached = shared.get_many(keys.values())
+        found, stale = {}, set()
+        for post_id, key in keys.items():
+            if cached.get(key) == STALE_POST:
+                stale.add(post_id)
+            elif key in cached:
+                found[post_id] = cached[key]
+        missing = [post_id for post_id in post_ids if post_id not in found]
+        if missing:
+            posts = Post.objects.for_feed().in_bulk(missing)
+            shared.set_many({
+                keys[post_id]: post for post_id, post in posts.items()
+                if post_id not in stale
+            }, POST_CACHE_TIMEOUT)
+            found.update(posts)
+        return {post_id: found.get(post_id) for post_id in post_ids}
+
+
+def load_post_detail(post_id):
+    """Данные страницы поста: пост с автором и группой, число постов автора
+    и моменты изменений (post_stamps) для ETag; None, если поста нет.
+
+    Собираются одним запросом и лежат в кэше, пока не сменятся версии
+    лент автора и группы: их обновляют правка поста, новые и удалённые
+    посты автора, переименование автора и группы.
+    """
+    key = post_detail_key(post_id)
+    detail = cache.get(key)
+    if detail is not None and post_stamps(detail['post']) == detail['stamps']:
+        return detail
+    started = time.time()
+    post = Post.objects.for_feed().annotate(
+        author_posts_count=Coalesce(Subquery(
+            PostCounter.objects.filter(key=Concat(
+                Value('author:'), OuterRef('author_id'),
+                output_field=CharField(),
+            )).values('value')[:1]
+        ), 0),
+    ).filter(pk=post_id).first()
+    if post is None:
+        return None
+    stamps = post_stamps(post)
+    detail = {
+        'post': post,
+        'author_posts_count': post.author_posts_count,
+        'stamps': stamps,
+    }
+    changed = max(stamps[1:])
+    # ленты менялись во время запроса или реплика могла отстать
+    if changed < started and not replica_may_lag(changed):
+        cache.set(key, detail, POST_CACHE_TIMEOUT)
+    return detail
@@ -0,0 +1,161 @@
+import os
+import platform
+import tempfile
+import time
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from posts import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет p50/p95 и число SQL-запросов страниц постов на '
+        'синтетических данных в отдельной тестовой базе.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'scenarios', nargs='*',
+            help=f'Сценарии замера: {", ".join(benchmark.SCENARIOS)} '
+                 f'(по умолчанию все).')
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--requests', type=int, default=50)
+        parser.add_argument(
+            '--warm-cache', action='store_true',
+            help='Не очищать кэш перед каждым запросом.')
+        parser.add_argument(
+            '--templates', action='store_true',
+            help='Добавить микрозамер рендеринга шаблонов ленты.')
+        parser.add_argument(
+            '--concurrency', action='store_true',
+            help='Добавить замер параллельных читателей и писателей на '
+                 'файловой базе SQLite с прагмами и без.')
+        parser.add_argument(
+            '--group-commit', action='store_true',
+            help='Добавить замер параллельной записи постов по одному и '
+                 'пачками (PostWriter) на файловой базе SQLite.')
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument(
+            '--duration', type=float, default=5.0,
+            help='Длительность замера параллельной нагрузки, с.')
+        parser.add_argument(
+            '--output', default='benchmark.json',
+            help='Куда записать результаты (JSON).')
+        parser.add_argument(
+            '--baseline', help='JSON с эталонными результатами.')
+        parser.add_argument(
+            '--save-baseline', action='store_true',
+            help='Записать результаты как новый эталон в --baseline.')
+
+    def use_file_database(self):
+        """Тестовая база в файле: у SQLite в памяти нет WAL."""
+        workdir = tempfile.mkdtemp()
+        connection.settings_dict['TEST']['NAME'] = os.path.join(
+            workdir, 'benchmark.sqlite3')
+        return workdir
+
+    def collect(self, options):
+        """Создаёт данные и выполняет замеры в отдельной тестовой базе."""
+        old_name = connection.settings_dict['NAME']
+        workdir = None
+        if options['concurrency'] or options['group_commit']:
+            workdir = self.use_file_database()
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            started = time.monotonic()
+            benchmark.seed(
+                options['users'], options['groups'], options['posts'])
+            self.stderr.write(
+                f'Данные созданы за {time.monotonic() - started:.1f} с')
+            report = {'results': benchmark.run(
+                options['scenarios'], options['requests'],
+                options['warm_cache'])}
+            if options['templates']:
+                report['templates'] = benchmark.templates()
+            if options['concurrency']:
+                report['concurrency'] = benchmark.concurrency(
+                    options['readers'], options['writers'],
+                    options['duration'])
+            if options['group_commit']:
+                report['group_commit'] = benchmark.group_commit(
+                    options['writers'], options['duration'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            if workdir:
+                os.rmdir(workdir)
+        return report
+
+    def write_concurrency(self, concurrency):
+        for name, value in concurrency.items():
+            self.stdout.write(
+                f"sqlite {name:<8} чтений/с {value['reads_per_s']:>8.1f}  "
+                f"записей/с {value['writes_per_s']:>7.1f}  "
+                f"p95 чтения {value['read_p95_ms']} мс  "
+                f"p95 записи {value['write_p95_ms']} мс  "
+                f"ошибок {value['errors']}")
+
+    def write_group_commit(self, group_commit):
+        for name, value in group_commit.items():
+            line = (
+                f"запись {name:<8} записей/с {value['writes_per_s']:>7.1f}  "
+                f"p95 записи {value['write_p95_ms']} мс  "
+                f"ошибок {value['errors']}")
+            if 'avg_batch' in value:
+                line += (
+                    f"  пачка {value['avg_batch']} (макс. "
+                    f"{value['max_batch']})  коммит "
+                    f"{value['avg_commit_ms']} мс")
+            self.stdout.write(line)
+
+    def handle(self, *args, **options):
+        unknown = set(options['scenarios']) - set(benchmark.SCENARIOS)
+        if unknown:
+            raise CommandError(f'Неизвестные сценарии: {", ".join(unknown)}')
+        report = {
+            'meta': {
+                'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'django': django.get_version(),
+                'python': platform.python_version(),
+                'users': options['users'],
+                'groups': options['groups'],
+                'posts': options['posts'],
+                'warm_cache': options['warm_cache'],
+            },
+            **self.collect(options),
+        }
+        results = report['results']
+        speedup = benchmark.api_speedup(results)
+        if speedup:
+            report['api_speedup'] = speedup
+        benchmark.dump(report, options['output'])
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<16} p50 {result['p50_ms']:>8.2f} мс  "
+                f"p95 {result['p95_ms']:>8.2f} мс  "
+                f"{result['rps']:>7.1f} запр./с  "
+                f"запросов {result['queries']}")
+        for name, value in speedup.items():
+            self.stdout.write(f'{name:<16} быстрее HTML в {value:.2f} раза')
+        for name, value in report.get('templates', {}).items():
+            self.stdout.write(f'{name:<24} {value:>8.4f} мс')
+        self.write_concurrency(report.get('concurrency', {}))
+        self.write_group_commit(report.get('group_commit', {}))
+        if not options['baseline']:
+            return
+        if options['save_baseline']:
+            benchmark.dump(report, options['baseline'])
+            return
+        found = benchmark.regressions(
+            results, benchmark.load(options['baseline'])['results'])
+        for name, problems in found.items():
+            self.stderr.write(self.style.ERROR(
+                f"{name}: {'; '.join(problems)}"))
+        if found:
+            raise CommandError('Производительность хуже эталона.')
+        self.stdout.write(self.style.SUCCESS('Регрессий нет.'))
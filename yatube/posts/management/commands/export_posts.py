@@ -0,0 +1,48 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.transfer import FORMATS, RowWriter, detect_format
+
+
+class Command(BaseCommand):
+    help = 'Выгружает посты в JSONL или CSV, не загружая таблицу в память.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='Файл для выгрузки или «-» для stdout.')
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, path, format, chunk_size, **options):
+        fmt = detect_format(path, format)
+        rows = Post.objects.order_by('id').values_list(
+            'id', 'text', 'pub_date', 'author__username', 'group__slug',
+        ).iterator(chunk_size=chunk_size)
+        started = time.monotonic()
+        file = (
+            sys.stdout if path == '-'
+            else open(path, 'w', encoding='utf-8', newline='')
+        )
+        count = 0
+        try:
+            writer = RowWriter(file, fmt)
+            for pk, text, pub_date, author, group in rows:
+                writer.write({
+                    'id': pk,
+                    'text': text,
+                    'pub_date': pub_date.isoformat(),
+                    'author': author,
+                    'group': group or '',
+                })
+                count += 1
+        finally:
+            if file is not sys.stdout:
+                file.close()
+        elapsed = time.monotonic() - started
+        self.stderr.write(self.style.SUCCESS(
+            f'Выгружено постов: {count} '
+            f'({count / elapsed if elapsed else 0:.0f} в секунду)'
+        ))
@@ -0,0 +1,96 @@
+import sys
+import time
+from contextlib import contextmanager
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts.models import Group, Post, User
+from posts.transfer import FORMATS, batched, detect_format, read_rows
+
+
+@contextmanager
+def keep_pub_date():
+    """Сохраняет pub_date из файла вместо auto_now_add."""
+    field = Post._meta.get_field('pub_date')
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+def resolve(lookup, queryset, field, names):
+    """Дополняет словарь имя -> id недостающими именами одним запросом."""
+    names = {name for name in names if name} - lookup.keys()
+    if names:
+        lookup.update(dict.fromkeys(names))
+        lookup.update(queryset.filter(
+            **{f'{field}__in': names}).values_list(field, 'id'))
+
+
+def parse_pub_date(value):
+    pub_date = parse_datetime(value) if value else None
+    if pub_date is None:
+        return timezone.now()
+    if timezone.is_naive(pub_date):
+        return timezone.make_aware(pub_date)
+    return pub_date
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает посты из JSONL или CSV пачками через bulk_create. '
+        'Автор задаётся username, группа — slug.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл с постами или «-» для stdin.')
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, path, format, batch_size, **options):
+        fmt = detect_format(path, format)
+        file = (
+            sys.stdin if path == '-'
+            else open(path, encoding='utf-8', newline='')
+        )
+        authors, groups = {}, {}
+        imported = skipped = 0
+        started = time.monotonic()
+        try:
+            for batch in batched(read_rows(file, fmt), batch_size):
+                resolve(authors, User.objects, 'username',
+                        (row.get('author') for row in batch))
+                resolve(groups, Group.objects, 'slug',
+                        (row.get('group') for row in batch))
+                posts = []
+                for row in batch:
+                    author_id = authors.get(row.get('author'))
+                    group_id = groups.get(row.get('group') or None)
+                    if (
+                        not row.get('text') or author_id is None
+                        or row.get('group') and group_id is None
+                    ):
+                        skipped += 1
+                        continue
+                    posts.append(Post(
+                        text=row['text'],
+                        author_id=author_id,
+                        group_id=group_id,
+                        pub_date=parse_pub_date(row.get('pub_date')),
+                    ))
+                with keep_pub_date():
+                    Post.objects.bulk_create(posts)
+                imported += len(posts)
+                if options['verbosity'] > 1:
+                    self.stderr.write(f'Загружено постов: {imported}')
+        finally:
+            if file is not sys.stdin:
+                file.close()
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено постов: {imported}, пропущено: {skipped} '
+            f'({imported / elapsed if elapsed else 0:.0f} в секунду)'
+        ))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Post, PostCounter
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики постов: всего, по авторам и по группам.'
+
+    def handle(self, *args, **options):
+        counters = PostCounter.objects.rebuild(Post.objects.all())
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано счётчиков: {len(counters)}, '
+            f'всего постов: {counters[PostCounter.TOTAL]}'
+        ))
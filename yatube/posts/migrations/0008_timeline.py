@@ -0,0 +1,61 @@
+# Generated by Django 2.2.16 on 2026-10-18 02:41
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+# posts.constants.TIMELINE_SIZE на момент миграции
+TIMELINE_SIZE = 50
+
+
+def fill_timeline(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    TimelineEntry = apps.get_model('posts', 'TimelineEntry')
+    alias = schema_editor.connection.alias
+    posts = Post.objects.using(alias).select_related(
+        'author', 'group').order_by('-pub_date', '-id')[:TIMELINE_SIZE]
+    TimelineEntry.objects.using(alias).bulk_create(
+        TimelineEntry(
+            post=post,
+            pub_date=post.pub_date,
+            text=post.text,
+            author=post.author,
+            author_username=post.author.username,
+            author_first_name=post.author.first_name,
+            author_last_name=post.author.last_name,
+            group=post.group,
+            group_slug=post.group.slug if post.group else '',
+            group_title=post.group.title if post.group else '',
+        ) for post in posts)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0007_post_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimelineEntry',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to='posts.Post')),
+                ('pub_date', models.DateTimeField()),
+                ('text', models.TextField()),
+                ('author_username', models.CharField(max_length=150)),
+                ('author_first_name', models.CharField(blank=True, max_length=30)),
+                ('author_last_name', models.CharField(blank=True, max_length=150)),
+                ('group_slug', models.SlugField(blank=True)),
+                ('group_title', models.CharField(blank=True, max_length=200)),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('group', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='posts.Group')),
+            ],
+            options={
+                'verbose_name': 'Запись главной ленты',
+                'verbose_name_plural': 'Главная лента',
+                'ordering': ('-pub_date', '-post_id'),
+            },
+        ),
+        migrations.RunPython(fill_timeline, migrations.RunPython.noop),
+    ]
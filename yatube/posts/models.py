@@ -1,6 +1,17 @@
-from django.db import models
+from collections import Counter
+
+from django.conf import settings
+from django.db import (DatabaseError, IntegrityError, models, router,
+                       transaction)
+from django.db.models import Count, F
 from django.contrib.auth import get_user_model
 
+from core.utils import cached_reverse
+from jobs.registry import enqueue_many
+
+from .caching import bump_feed_versions, forget_posts, post_feeds
+from .constants import TIMELINE_SIZE
+
 User = get_user_model()
 
 
@@ -16,6 +27,135 @@ class Group(models.Model):
     def __str__(self):
         return self.title
 
+    def get_absolute_url(self):
+        return cached_reverse('posts:group_list', self.slug)
+
+
+class PostCounterQuerySet(models.QuerySet):
+    def value(self, key):
+        return self.filter(key=key).values_list(
+            'value', flat=True).first() or 0
+
+    def change(self, key, delta):
+        if not delta or self.filter(key=key).update(value=F('value') + delta):
+            return
+        try:
+            with transaction.atomic(using=self.db):
+                self.create(key=key, value=delta)
+        except IntegrityError:
+            self.filter(key=key).update(value=F('value') + delta)
+
+    def posts_added(self, posts, sign=1):
+        deltas = Counter()
+        for post in posts:
+            deltas[PostCounter.TOTAL] += sign
+            deltas[PostCounter.author_key(post.author_id)] += sign
+            if post.group_id is not None:
+                deltas[PostCounter.group_key(post.group_id)] += sign
+        for key, delta in deltas.items():
+            self.change(key, delta)
+
+    def posts_deleted(self, posts):
+        self.posts_added(posts, sign=-1)
+
+    def group_changed(self, old_group_id, new_group_id):
+        if old_group_id is not None:
+            self.change(PostCounter.group_key(old_group_id), -1)
+        if new_group_id is not None:
+            self.change(PostCounter.group_key(new_group_id), 1)
+
+    def rebuild(self, posts):
+        """Пересчитывает все счётчики по таблице постов."""
+        counters = {PostCounter.TOTAL: posts.count()}
+        for row in posts.order_by().values('author').annotate(
+                count=Count('id')):
+            counters[PostCounter.author_key(row['author'])] = row['count']
+        for row in posts.order_by().exclude(group=None).values(
+                'group').annotate(count=Count('id')):
+            counters[PostCounter.group_key(row['group'])] = row['count']
+        with transaction.atomic(using=self.db):
+            self.all().delete()
+            self.bulk_create(
+                PostCounter(key=key, value=value)
+                for key, value in counters.items())
+        return counters
+
+
+class PostCounter(models.Model):
+    """Денормализованное количество постов: всего, у автора, в группе."""
+    TOTAL = 'total'
+
+    key = models.CharField(max_length=64, primary_key=True)
+    value = models.IntegerField(default=0)
+
+    objects = PostCounterQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Счётчик постов'
+        verbose_name_plural = 'Счётчики постов'
+
+    def __str__(self):
+        return f'{self.key}: {self.value}'
+
+    @staticmethod
+    def author_key(author_id):
+        return f'author:{author_id}'
+
+    @staticmethod
+    def group_key(group_id):
+        return f'group:{group_id}'
+
+
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        """Посты для лент: автор и группа одним JOIN, без лишних колонок."""
+        return self.select_related('author', 'group').only(
+            'id', 'text', 'pub_date', 'updated_at', 'author', 'group',
+            'author__username', 'author__first_name', 'author__last_name',
+            'group__slug', 'group__title',
+        )
+
+    def insert(self, posts):
+        """Сохраняет новые посты одной транзакцией.
+
+        Счётчики, главная лента и задачи обновляются сразу для всей пачки.
+        Возвращает ошибки вставки по порядку постов (None — пост сохранён):
+        пост с ошибкой откатывается до своей точки сохранения, не мешая
+        остальным.
+        """
+        saved, errors = [], []
+        with transaction.atomic(using=self.db):
+            for post in posts:
+                try:
+                    with transaction.atomic(using=self.db):
+                        models.Model.save(post, using=self.db)
+                except DatabaseError as error:
+                    errors.append(error)
+                    continue
+                errors.append(None)
+                saved.append(post)
+            PostCounter.objects.using(self.db).posts_added(saved)
+            TimelineEntry.objects.using(self.db).push(*saved)
+            # задачи пишутся в той же транзакции, что и посты;
+            # письмо модератору — только если он указан в MANAGERS
+            if settings.MANAGERS:
+                enqueue_many('posts.notify_managers', [
+                    {'post_id': post.pk} for post in saved])
+        for post in saved:
+            post._loaded_group_id = post.group_id
+        bump_feed_versions(set().union(*map(post_feeds, saved)))
+        return errors
+
+    def bulk_create(self, objs, *args, **kwargs):
+        with transaction.atomic(using=self.db):
+            objs = super().bulk_create(objs, *args, **kwargs)
+            PostCounter.objects.using(self.db).posts_added(objs)
+            # при импорте посты бывают и старыми, проще собрать ленту заново
+            TimelineEntry.objects.using(self.db).rebuild(
+                Post.objects.using(self.db))
+        bump_feed_versions(set().union(*(post_feeds(post) for post in objs)))
+        return objs
+
 
 class Post(models.Model):
     text = models.TextField(verbose_name='Текст поста')
@@ -23,6 +163,10 @@ class Post(models.Model):
         auto_now_add=True,
         verbose_name='Дата публикации'
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения'
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -38,10 +182,158 @@ class Post(models.Model):
         verbose_name='Группа'
     )
 
+    objects = PostQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
-        ordering = ('-pub_date',)
+        ordering = ('-pub_date', '-id')
+        # по индексу на каждый способ выборки ленты: фильтр + сортировка
+        indexes = (
+            models.Index(
+                fields=('-pub_date', '-id'), name='post_feed_idx'),
+            models.Index(
+                fields=('group', '-pub_date', '-id'),
+                name='post_group_feed_idx'),
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='post_author_feed_idx'),
+        )
 
     def __str__(self):
         return self.text[:15]
+
+    def get_absolute_url(self):
+        return cached_reverse('posts:post_detail', self.pk)
+
+    def get_author_url(self):
+        return cached_reverse('posts:profile', self.author.username)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        post = super().from_db(db, field_names, values)
+        # группа на момент загрузки, чтобы заметить перенос поста
+        if 'group_id' in post.__dict__:
+            post._loaded_group_id = post.group_id
+        return post
+
+    def save(self, *args, **kwargs):
+        using = kwargs.get('using') or router.db_for_write(
+            type(self), instance=self)
+        if self._state.adding:
+            error, = Post.objects.using(using).insert([self])
+            if error is not None:
+                raise error
+            return
+        previous_group_id = getattr(self, '_loaded_group_id', None)
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+            TimelineEntry.objects.using(using).post_changed(self)
+            if (
+                hasattr(self, '_loaded_group_id')
+                and previous_group_id != self.group_id
+            ):
+                PostCounter.objects.using(using).group_changed(
+                    previous_group_id, self.group_id)
+        self._loaded_group_id = self.group_id
+        forget_posts([self.pk])
+        bump_feed_versions(post_feeds(self, previous_group_id))
+
+
+class TimelineEntryQuerySet(models.QuerySet):
+    def push(self, *posts):
+        """Добавляет новые посты и оставляет TIMELINE_SIZE последних."""
+        if not posts:
+            return
+        self.bulk_create(
+            TimelineEntry(post=post, **TimelineEntry.post_fields(post))
+            for post in posts)
+        self.filter(pk__in=self.values('pk')[TIMELINE_SIZE:]).delete()
+
+    def post_changed(self, post):
+        self.filter(pk=post.pk).update(**TimelineEntry.post_fields(post))
+
+    def author_changed(self, author):
+        self.filter(author=author.pk).update(
+            author_username=author.username,
+            author_first_name=author.first_name,
+            author_last_name=author.last_name,
+        )
+
+    def group_changed(self, group):
+        self.filter(group=group.pk).update(
+            group_slug=group.slug, group_title=group.title)
+
+    def rebuild(self, posts):
+        """Заполняет ленту последними постами из posts."""
+        with transaction.atomic(using=self.db):
+            self.all().delete()
+            self.bulk_create(
+                TimelineEntry(post=post, **TimelineEntry.post_fields(post))
+                for post in posts.for_feed()[:TIMELINE_SIZE])
+
+
+class TimelineEntry(models.Model):
+    """Один из последних постов главной ленты вместе с автором и группой.
+
+    Таблица содержит TIMELINE_SIZE самых новых постов (после удалений —
+    меньше), поэтому первые страницы главной ленты читаются из неё без
+    сортировки posts_post и JOIN с auth_user.
+    """
+    post = models.OneToOneField(
+        Post, primary_key=True, on_delete=models.CASCADE, related_name='+')
+    pub_date = models.DateTimeField()
+    text = models.TextField()
+    author = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='+')
+    author_username = models.CharField(max_length=150)
+    author_first_name = models.CharField(max_length=30, blank=True)
+    author_last_name = models.CharField(max_length=150, blank=True)
+    group = models.ForeignKey(
+        Group, blank=True, null=True, on_delete=models.SET_NULL,
+        related_name='+')
+    group_slug = models.SlugField(blank=True)
+    group_title = models.CharField(max_length=200, blank=True)
+
+    objects = TimelineEntryQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Запись главной ленты'
+        verbose_name_plural = 'Главная лента'
+        ordering = ('-pub_date', '-post_id')
+
+    def __str__(self):
+        return f'{self.pub_date}: {self.post_id}'
+
+    @staticmethod
+    def post_fields(post):
+        author, group = post.author, post.group
+        return {
+            'pub_date': post.pub_date,
+            'text': post.text,
+            'author': author,
+            'author_username': author.username,
+            'author_first_name': author.first_name,
+            'author_last_name': author.last_name,
+            'group': group,
+            'group_slug': group.slug if group else '',
+            'group_title': group.title if group else '',
+        }
+
+    def as_post(self):
+        """Несохранённый Post с автором и группой — для шаблонов ленты."""
+        return Post(
+            id=self.post_id,
+            text=self.text,
+            pub_date=self.pub_date,
+            author=User(
+                id=self.author_id,
+                username=self.author_username,
+                first_name=self.author_first_name,
+                last_name=self.author_last_name,
+            ),
+            group=Group(
+                id=self.group_id, slug=self.group_slug,
+                title=self.group_title,
+            ) if self.group_id else None,
+        )
@@ -0,0 +1,136 @@
+"""Полнотекстовый поиск по постам на SQLite FTS5.
+
+Индекс posts_post_fts ссылается на таблицу posts_post (external content)
+и поддерживается триггерами, поэтому в синхронизации участвуют все пути
+записи: save, bulk_create, update и удаление. На других СУБД поиск
+сводится к icontains.
+"""
+import re
+
+from django.db import connections, router
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .loader import PostLoader
+from .models import Post
+
+FTS_TABLE = 'posts_post_fts'
+# маркеры подсветки в snippet(); экранирование HTML их не трогает
+MARK_START, MARK_END = '\x02', '\x03'
+SNIPPET_TOKENS = 24
+
+INSTALL_SQL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"text, content='posts_post', content_rowid='id', "
+    f"tokenize='unicode61 remove_diacritics 2')",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON posts_post "
+    f"BEGIN INSERT INTO {FTS_TABLE}(rowid, text) "
+    f"VALUES (new.id, new.text); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON posts_post "
+    f"BEGIN INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) "
+    f"VALUES ('delete', old.id, old.text); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au "
+    f"AFTER UPDATE OF text ON posts_post "
+    f"BEGIN INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) "
+    f"VALUES ('delete', old.id, old.text); "
+    f"INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text); END",
+)
+REBUILD_SQL = f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+
+
+def _connection():
+    return connections[router.db_for_read(Post)]
+
+
+def is_available(connection=None):
+    return (connection or _connection()).vendor == 'sqlite'
+
+
+def rebuild_index(connection=None):
+    """Создаёт индекс и триггеры, если их нет, и заполняет индекс заново.
+
+    Нужна и после миграций, пересоздающих таблицу posts_post: SQLite
+    удаляет триггеры вместе со старой таблицей.
+    """
+    connection = connection or connections[router.db_for_write(Post)]
+    with connection.cursor() as cursor:
+        for sql in INSTALL_SQL + (REBUILD_SQL,):
+            cursor.execute(sql)
+
+
+def fts_query(query):
+    """Запрос FTS5 из строки пользователя: все слова, каждое как префикс."""
+    return ' '.join(f'"{word}"*' for word in re.findall(r'\w+', query))
+
+
+def highlight(snippet):
+    return mark_safe(
+        escape(snippet)
+        .replace(MARK_START, '<mark>')
+        .replace(MARK_END, '</mark>')
+    )
+
+
+def matching_ids(query):
+    """Подзапрос с id постов, подходящих под запрос (для фильтров)."""
+    if not is_available():
+        return Post.objects.filter(text__icontains=query).values('id')
+    match = fts_query(query)
+    if not match:
+        # в запросе нет ни одного слова, а пустой MATCH — ошибка FTS5
+        return Post.objects.none().values('id')
+    return RawSQL(
+        f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+        (match,),
+    )
+
+
+class SearchResults:
+    """Найденные посты в порядке релевантности для Paginator.
+
+    Срез выполняет один запрос к индексу и один — за самими постами.
+    """
+
+    def __init__(self, query, loader=None):
+        self.query = fts_query(query)
+        self.raw_query = query
+        self.loader = loader or PostLoader()
+
+    def count(self):
+        if not self.query:
+            return 0
+        if not is_available():
+            return Post.objects.filter(text__icontains=self.raw_query).count()
+        with _connection().cursor() as cursor:
+            cursor.execute(
+                f'SELECT count(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+                (self.query,))
+            return cursor.fetchone()[0]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        offset = index.start or 0
+        limit = index.stop - offset
+        if not self.query or limit <= 0:
+            return []
+        if not is_available():
+            return list(Post.objects.for_feed().filter(
+                text__icontains=self.raw_query)[offset:index.stop])
+        with _connection().cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid, snippet({FTS_TABLE}, 0, %s, %s, %s, %s) '
+                f'FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+                f'ORDER BY rank LIMIT %s OFFSET %s',
+                (MARK_START, MARK_END, '…', SNIPPET_TOKENS,
+                 self.query, limit, offset))
+            rows = cursor.fetchall()
+        snippets = dict(rows)
+        results = self.loader.load_many(snippets)
+        for post in results:
+            post.snippet = highlight(snippets[post.pk])
+        return results
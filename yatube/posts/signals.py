@@ -0,0 +1,64 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models.signals import (post_delete, post_migrate, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+
+from core.cache import SHARED_CACHE
+
+from .caching import (INDEX_FEED, author_feed, bump_feed_versions,
+                      forget_posts, group_feed, post_feeds)
+from .models import Group, Post, PostCounter, TimelineEntry, User
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, using, **kwargs):
+    # вызывается и при каскадном удалении, внутри транзакции удаления
+    PostCounter.objects.using(using).posts_deleted([instance])
+    forget_posts([instance.pk])
+    bump_feed_versions(post_feeds(instance))
+
+
+@receiver(pre_delete, sender=Group)
+def group_deleting(sender, instance, using, **kwargs):
+    # после удаления у постов уже не будет ссылки на группу
+    forget_posts(Post.objects.using(using).filter(
+        group=instance).values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, instance, using, **kwargs):
+    PostCounter.objects.using(using).filter(
+        key=PostCounter.group_key(instance.pk)).delete()
+    bump_feed_versions({group_feed(instance.pk)})
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, using, **kwargs):
+    if not created:
+        TimelineEntry.objects.using(using).group_changed(instance)
+        forget_posts(instance.posts.values_list('id', flat=True))
+        bump_feed_versions({group_feed(instance.pk)})
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields, using, **kwargs):
+    # имя автора видно во всех лентах с его постами; вход на сайт
+    # обновляет только last_login и ленты не меняет
+    if created or update_fields == frozenset({'last_login'}):
+        return
+    TimelineEntry.objects.using(using).author_changed(instance)
+    forget_posts(instance.posts.values_list('id', flat=True))
+    feeds = {INDEX_FEED, author_feed(instance.pk)}
+    feeds.update(
+        group_feed(group_id) for group_id in instance.posts.exclude(
+            group=None).order_by().values_list('group', flat=True).distinct())
+    bump_feed_versions(feeds)
+
+
+@receiver(post_migrate)
+def schema_migrated(sender, **kwargs):
+    # общий кэш переживает перезапуск, а посты в нём сохранены по старой
+    # схеме; у тестовой базы свой кэш в памяти, и он ещё пуст
+    if sender.name == 'posts' and not settings.ISOLATED_SHARED_CACHE:
+        caches[SHARED_CACHE].clear()
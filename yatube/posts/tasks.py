@@ -0,0 +1,24 @@
+from django.core.mail import mail_managers
+from django.template.loader import render_to_string
+
+from jobs.registry import task
+
+from .models import Post
+
+
+@task('posts.notify_managers', batch=True)
+def notify_managers(payloads):
+    """Одно письмо модератору обо всех новых постах пачки."""
+    posts = list(
+        Post.objects.for_feed().filter(
+            pk__in=[payload['post_id'] for payload in payloads]
+        ).order_by('pub_date', 'pk')
+    )
+    if not posts:
+        return
+    mail_managers(
+        f'Новые посты: {len(posts)}',
+        render_to_string('posts/managers_digest.txt', {
+            'posts': posts,
+        }),
+    )
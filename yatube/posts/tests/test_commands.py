@@ -0,0 +1,90 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts import benchmark
+from posts.models import Group, Post, PostCounter, User
+
+
+class PostsTransferCommandsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='group',
+            description='Тестовое описание',
+        )
+        Post.objects.create(author=cls.user, text='Первый, "пост"')
+        Post.objects.create(
+            author=cls.user, text='Второй\nпост', group=cls.group)
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def round_trip(self, filename):
+        path = os.path.join(self.directory.name, filename)
+        call_command('export_posts', path, chunk_size=1, stderr=StringIO())
+        expected = list(Post.objects.order_by('id').values_list(
+            'text', 'pub_date', 'author', 'group'))
+        Post.objects.all().delete()
+        out = StringIO()
+        call_command('import_posts', path, batch_size=1, stdout=out)
+        self.assertIn('Загружено постов: 2, пропущено: 0', out.getvalue())
+        self.assertEqual(
+            list(Post.objects.order_by('id').values_list(
+                'text', 'pub_date', 'author', 'group')),
+            expected)
+        self.assertEqual(PostCounter.objects.value(PostCounter.TOTAL), 2)
+
+    def test_jsonl_round_trip(self):
+        """Выгрузка в JSONL и загрузка обратно сохраняют посты."""
+        self.round_trip('posts.jsonl')
+
+    def test_csv_round_trip(self):
+        """Выгрузка в CSV и загрузка обратно сохраняют посты."""
+        self.round_trip('posts.csv')
+
+    def test_import_skips_unknown_authors_and_groups(self):
+        """Посты с неизвестным автором или группой пропускаются."""
+        path = os.path.join(self.directory.name, 'posts.jsonl')
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(
+                '{"text": "Пост", "author": "author", "group": "group"}\n'
+                '{"text": "Пост", "author": "nobody"}\n'
+                '{"text": "Пост", "author": "author", "group": "nogroup"}\n')
+        out = StringIO()
+        call_command('import_posts', path, stdout=out)
+        self.assertIn('Загружено постов: 1, пропущено: 2', out.getvalue())
+
+
+class PostsBenchmarkTests(TestCase):
+    def test_benchmark_measures_every_scenario(self):
+        """Замер проходит все сценарии на синтетических данных."""
+        benchmark.seed(users=3, groups=2, posts=30)
+        self.assertEqual(Post.objects.count(), 30)
+        results = benchmark.run(requests=2)
+        self.assertEqual(set(results), set(benchmark.SCENARIOS))
+        for name, result in results.items():
+            with self.subTest(name=name):
+                self.assertGreater(result['queries'], 0)
+                self.assertLessEqual(result['p50_ms'], result['p95_ms'])
+        self.assertEqual(set(benchmark.templates(repeat=1)), {
+            'render_ms', 'render_cached_loader_ms',
+            'reverse_ms', 'cached_reverse_ms'})
+
+    def test_regressions_compare_with_baseline(self):
+        """Регрессией считается рост p95 сверх допуска или числа запросов."""
+        baseline = {'index': {'p95_ms': 10, 'queries': 2}}
+        self.assertEqual(benchmark.regressions(
+            {'index': {'p95_ms': 11, 'queries': 2}}, baseline), {})
+        self.assertEqual(set(benchmark.regressions(
+            {'index': {'p95_ms': 13, 'queries': 3}}, baseline)['index']), {
+                'p95 13 мс > 10 мс', 'запросов 3 > 2'})
@@ -0,0 +1,94 @@
+import json
+from xml.etree import ElementTree
+
+from django.core.cache import caches
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.cache import SHARED_CACHE
+from posts.models import Group, Post, User
+
+ATOM = '{http://www.w3.org/2005/Atom}'
+INDEX_FEED_URL = reverse('posts:index_feed')
+GROUP_FEED_URL = reverse('posts:group_list_feed', kwargs={'slug': 'cats'})
+PROFILE_FEED_URL = reverse(
+    'posts:profile_feed', kwargs={'username': 'author'})
+
+
+class PostsFeedsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='author', first_name='Лев', last_name='Толстой')
+        cls.group = Group.objects.create(
+            title='Кошки & собаки', slug='cats', description='Описание')
+        cls.group_post = Post.objects.create(
+            text='Пост <в группе>', author=cls.author, group=cls.group)
+        cls.post = Post.objects.create(
+            text='Пост без группы', author=cls.author)
+
+    def setUp(self):
+        caches['default'].clear()
+        caches[SHARED_CACHE].clear()
+        self.client = Client()
+
+    def test_atom_feeds(self):
+        """Atom-ленты содержат посты своей ленты с автором и группой."""
+        cases = (
+            (INDEX_FEED_URL, [self.post, self.group_post]),
+            (GROUP_FEED_URL, [self.group_post]),
+            (PROFILE_FEED_URL, [self.post, self.group_post]),
+        )
+        for url, posts in cases:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertTrue(response.streaming)
+                self.assertEqual(
+                    response['Content-Type'],
+                    'application/atom+xml; charset=utf-8')
+                root = ElementTree.fromstring(
+                    b''.join(response.streaming_content))
+                entries = root.findall(f'{ATOM}entry')
+                self.assertEqual(
+                    [entry.find(f'{ATOM}content').text for entry in entries],
+                    [post.text for post in posts])
+                self.assertEqual(
+                    entries[0].find(f'{ATOM}author/{ATOM}name').text,
+                    'Лев Толстой')
+        category = entries[-1].find(f'{ATOM}category')
+        self.assertEqual(category.get('label'), self.group.title)
+
+    def test_json_feed(self):
+        """JSON Feed отдаётся по ?format=json."""
+        response = self.client.get(GROUP_FEED_URL, {'format': 'json'})
+        self.assertEqual(
+            response['Content-Type'], 'application/feed+json; charset=utf-8')
+        feed = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(feed['title'], 'Записи сообщества Кошки & собаки')
+        self.assertEqual(
+            [(item['id'], item['content_text'], item['tags'])
+             for item in feed['items']],
+            [(str(self.group_post.pk), self.group_post.text,
+              [self.group.title])])
+
+    def test_unchanged_feed_is_not_modified(self):
+        """Опрос неизменной ленты получает 304, новый пост меняет ETag."""
+        response = self.client.get(INDEX_FEED_URL)
+        etag = response['ETag']
+        cached = self.client.get(
+            INDEX_FEED_URL, HTTP_IF_NONE_MATCH=etag,
+            HTTP_IF_MODIFIED_SINCE=response.get('Last-Modified', ''))
+        self.assertEqual(cached.status_code, 304)
+        Post.objects.create(text='Новый пост', author=self.author)
+        self.assertEqual(self.client.get(
+            INDEX_FEED_URL, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_unknown_group_or_author(self):
+        """Лента несуществующей группы или автора — 404."""
+        for url in (
+            reverse('posts:group_list_feed', kwargs={'slug': 'missing'}),
+            reverse('posts:profile_feed', kwargs={'username': 'missing'}),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
@@ -0,0 +1,84 @@
+from django.core.cache import caches
+from django.test import TestCase
+
+from core.cache import SHARED_CACHE
+from posts.caching import author_feed, feed_version
+from posts.loader import PostLoader
+from posts.models import Group, Post, User
+
+
+class PostLoaderTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='group', description='Описание')
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=cls.author, group=cls.group)
+            for i in range(5))
+        cls.ids = list(Post.objects.values_list('id', flat=True))
+
+    def setUp(self):
+        caches['default'].clear()
+        caches[SHARED_CACHE].clear()
+
+    def test_loads_batch_in_order(self):
+        """Посты с автором и группой грузятся одним запросом по порядку id."""
+        ids = [self.ids[3], 0, self.ids[1], self.ids[3]]
+        with self.assertNumQueries(1):
+            posts = PostLoader().load_many(ids)
+            self.assertEqual(
+                [(post.pk, post.author.username, post.group.slug)
+                 for post in posts],
+                [(self.ids[3], 'author', 'group'),
+                 (self.ids[1], 'author', 'group'),
+                 (self.ids[3], 'author', 'group')])
+
+    def test_memo_and_cache(self):
+        """Повторные id берутся из памяти запроса, затем из кэша."""
+        loader = PostLoader()
+        loader.load_many(self.ids[:3])
+        with self.assertNumQueries(0):
+            loader.load(self.ids[0])
+            PostLoader().load_many(self.ids[:3])
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                len(PostLoader().load_many(self.ids)), len(self.ids))
+
+    def test_changes_reset_cache(self):
+        """Правка поста, автора или группы сбрасывает закэшированный пост."""
+        PostLoader().load_many(self.ids)
+        post = Post.objects.get(pk=self.ids[0])
+        post.text = 'Исправленный пост'
+        post.save()
+        self.assertEqual(
+            PostLoader().load(self.ids[0]).text, 'Исправленный пост')
+        author = User.objects.get(pk=self.author.pk)
+        author.first_name = 'Лев'
+        author.save()
+        group = Group.objects.get(pk=self.group.pk)
+        group.title = 'Новое название'
+        group.save()
+        post = PostLoader().load(self.ids[1])
+        self.assertEqual(
+            (post.author.first_name, post.group.title),
+            ('Лев', 'Новое название'))
+        Group.objects.filter(pk=self.group.pk).delete()
+        self.assertIsNone(PostLoader().load(self.ids[1]).group)
+        Post.objects.filter(pk=self.ids[2]).delete()
+        self.assertIsNone(PostLoader().load(self.ids[2]))
+
+    def test_changes_seen_by_other_workers(self):
+        """Версии лент и сброс постов видны воркеру со своим default."""
+        feed = author_feed(self.author.pk)
+        version = feed_version(feed)
+        PostLoader().load_many(self.ids)
+        post = Post.objects.get(pk=self.ids[0])
+        post.text = 'Исправленный пост'
+        post.save()
+        # память процесса другого воркера пуста, общий кэш — тот же
+        caches['default'].clear()
+        self.assertGreater(feed_version(feed), version)
+        self.assertEqual(
+            PostLoader().load(self.ids[0]).text, 'Исправленный пост')
@@ -1,7 +1,14 @@
 # from django.contrib.auth import get_user_model
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.urls import reverse
 
-from ..models import Group, Post, User
+from ..forms import PostForm
+from ..models import Group, Post, PostCounter, User
 
 
 class PostModelTest(TestCase):
@@ -23,3 +30,105 @@ class PostModelTest(TestCase):
         """Проверяем, что у моделей корректно работает __str__."""
         self.assertEqual(self.post.text[:15], str(self.post))
         self.assertEqual(self.group.title, str(self.group))
+
+    def test_models_urls(self):
+        """Ссылки моделей совпадают с reverse() по их маршрутам."""
+        cases = [
+            (self.post.get_absolute_url(),
+             reverse('posts:post_detail', args=(self.post.pk,))),
+            (self.post.get_author_url(),
+             reverse('posts:profile', args=(self.user.username,))),
+            (Group(slug='group').get_absolute_url(),
+             reverse('posts:group_list', args=('group',))),
+        ]
+        for url, expected in cases:
+            with self.subTest(expected=expected):
+                self.assertEqual(url, expected)
+
+
+class PostCounterTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='group',
+            description='Тестовое описание',
+        )
+        cls.group2 = Group.objects.create(
+            title='Тестовая группа 2',
+            slug='group2',
+            description='Тестовое описание',
+        )
+
+    def assertCounters(self, total, author, group, group2=0):
+        self.assertEqual(
+            PostCounter.objects.value(PostCounter.TOTAL), total)
+        self.assertEqual(
+            PostCounter.objects.value(PostCounter.author_key(self.user.id)),
+            author)
+        self.assertEqual(
+            PostCounter.objects.value(PostCounter.group_key(self.group.id)),
+            group)
+        self.assertEqual(
+            PostCounter.objects.value(PostCounter.group_key(self.group2.id)),
+            group2)
+
+    def test_counters_follow_post_changes(self):
+        """Счётчики меняются при создании, переносе и удалении постов."""
+        post = Post.objects.create(
+            author=self.user, text='Пост', group=self.group)
+        Post.objects.bulk_create(
+            Post(author=self.user, text=f'Пост {i}') for i in range(2))
+        self.assertCounters(3, 3, 1)
+        post = Post.objects.get(pk=post.pk)
+        PostForm(
+            {'text': 'Пост', 'group': self.group2.id}, instance=post).save()
+        self.assertCounters(3, 3, 0, 1)
+        post.delete()
+        self.assertCounters(2, 2, 0, 0)
+        User.objects.get(pk=self.user.pk).delete()
+        self.assertEqual(PostCounter.objects.value(PostCounter.TOTAL), 0)
+
+    def test_rebuild_command(self):
+        """Команда rebuild_post_counters восстанавливает счётчики."""
+        Post.objects.create(author=self.user, text='Пост', group=self.group)
+        PostCounter.objects.all().delete()
+        call_command('rebuild_post_counters', stdout=StringIO())
+        self.assertCounters(1, 1, 1)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN есть в SQLite')
+class PostIndexesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='group',
+            description='Тестовое описание',
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f'Пост {i}', group=cls.group)
+            for i in range(20))
+
+    def query_plan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            return ' '.join(row[-1] for row in cursor.fetchall())
+
+    def test_feeds_use_index_without_sorting(self):
+        """Запросы лент идут по индексу и не сортируют строки."""
+        cases = [
+            (Post.objects.for_feed()[:10], 'post_feed_idx'),
+            (self.group.posts.for_feed()[:10], 'post_group_feed_idx'),
+            (self.user.posts.for_feed()[:10], 'post_author_feed_idx'),
+        ]
+        for queryset, index in cases:
+            with self.subTest(index=index):
+                plan = self.query_plan(queryset)
+                self.assertIn(index, plan)
+                self.assertNotIn('TEMP B-TREE', plan)
@@ -0,0 +1,89 @@
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Post, User
+
+from ..constants import SEARCH_TEMPLATE
+
+SEARCH_URL = reverse('posts:search')
+ADMIN_SEARCH_URL = reverse('admin:posts_post_changelist')
+
+
+@skipUnless(connection.vendor == 'sqlite', 'FTS5 есть только в SQLite')
+class PostsSearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='admin', is_staff=True, is_superuser=True)
+        cls.cat_post = Post.objects.create(
+            author=cls.user,
+            text='Кошки <b>спят</b> шестнадцать часов в сутки.')
+        cls.cats_post = Post.objects.create(
+            author=cls.user,
+            text='Кошки, кошки и ещё раз кошки.')
+        cls.dog_post = Post.objects.create(
+            author=cls.user,
+            text='Собака лает, караван идёт.')
+
+    def setUp(self):
+        self.client = Client()
+
+    def found(self, query):
+        response = self.client.get(SEARCH_URL, {'q': query})
+        return list(response.context['page_obj'])
+
+    def test_search_ranks_and_matches_prefixes(self):
+        """Поиск находит слова по префиксу и ранжирует результаты."""
+        self.assertEqual(self.found('кош'), [self.cats_post, self.cat_post])
+        self.assertEqual(self.found('караван соба'), [self.dog_post])
+        self.assertEqual(self.found('слон'), [])
+
+    def test_snippet_is_highlighted_and_escaped(self):
+        """В сниппете подсвечены совпадения, а HTML поста экранирован."""
+        response = self.client.get(SEARCH_URL, {'q': 'спят'})
+        self.assertTemplateUsed(response, SEARCH_TEMPLATE)
+        self.assertContains(response, '&lt;b&gt;<mark>спят</mark>&lt;/b&gt;')
+
+    def test_index_follows_post_changes(self):
+        """Индекс обновляется при правке и удалении поста."""
+        post = Post.objects.get(pk=self.dog_post.pk)
+        post.text = 'Лиса крадётся'
+        post.save()
+        self.assertEqual(self.found('собака'), [])
+        self.assertEqual(self.found('лиса'), [post])
+        post.delete()
+        self.assertEqual(self.found('лиса'), [])
+
+    def test_admin_uses_index(self):
+        """Поиск в админке идёт по полнотекстовому индексу."""
+        self.client.force_login(self.user)
+        response = self.client.get(ADMIN_SEARCH_URL, {'q': 'караван'})
+        self.assertEqual(
+            list(response.context['cl'].result_list), [self.dog_post])
+
+    def test_admin_query_without_words(self):
+        """Запрос в админке без слов ничего не находит и не падает."""
+        self.client.force_login(self.user)
+        for query in ('!!!', '-', '@'):
+            with self.subTest(query=query):
+                response = self.client.get(ADMIN_SEARCH_URL, {'q': query})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(list(response.context['cl'].result_list), [])
+
+    def test_rebuild_command(self):
+        """Команда rebuild_search_index восстанавливает индекс."""
+        with connection.cursor() as cursor:
+            cursor.execute('DROP TRIGGER posts_post_fts_ai')
+            cursor.execute(
+                "INSERT INTO posts_post_fts(posts_post_fts) "
+                "VALUES ('delete-all')")
+        post = Post.objects.create(author=self.user, text='Ёжик в тумане')
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(self.found('ёжик'), [post])
+        self.assertEqual(self.found('кошки'), [self.cats_post, self.cat_post])
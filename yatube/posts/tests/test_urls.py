@@ -1,7 +1,8 @@
-from django.core.cache import cache
+from django.core.cache import caches
 from django.test import Client, TestCase
 from django.urls import reverse
 
+from core.cache import SHARED_CACHE
 from posts.models import Group, Post, User
 
 from ..constants import (INDEX_TEMPLATE, GROUP_LIST_TEMPLATE,
@@ -52,7 +53,8 @@ class PostsUrlsTests(TestCase):
         self.another = Client()
         self.another.force_login(self.user2)
 
-        cache.clear()
+        caches['default'].clear()
+        caches[SHARED_CACHE].clear()
 
     def test_all_cases(self):
         """Проверка доступа страниц приложения post для разных юзеров."""
@@ -1,9 +1,20 @@
-from django.test import Client, TestCase
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import caches
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils.http import http_date
 
+from core.cache import SHARED_CACHE
+from posts.caching import INDEX_FEED
 from posts.models import Group, Post, User
 
-from ..constants import MAX_POSTS_COUNT
+from ..constants import (CURSOR_NEXT, MAX_POSTS_COUNT, TIMELINE_PAGES,
+                         TIMELINE_SIZE)
+from ..utils import encode_cursor
 
 SLUG1 = 'slug1'
 SLUG2 = 'slug2'
@@ -23,6 +34,10 @@ PROFILE2_URL = reverse(
     'posts:profile',
     kwargs={'username': USERNAME2})
 CREATE_PAGE_URL = reverse('posts:post_create')
+# замеры запросов самих представлений, без кэша готовых страниц
+NO_PAGE_CACHE = override_settings(PAGE_CACHE={'ENABLED': False})
+# момент изменения ленты в проверках Last-Modified, целая секунда
+CHANGED = 1600000000
 
 
 class PostsViewsTests(TestCase):
@@ -140,3 +155,340 @@ class PostsPaginatorViewsTests(TestCase):
                 self.assertEqual(
                     len(response.context.get('page_obj').object_list),
                     posts_count)
+
+    def test_cursor_pages_walk_whole_feed(self):
+        """Курсорная пагинация проходит ленту без пропусков и повторов."""
+        for url in (INDEX_URL, GROUP_LIST_URL, PROFILE1_URL):
+            with self.subTest(url=url):
+                seen = []
+                page = self.authorized_client.get(
+                    url + '?cursor=').context['page_obj']
+                self.assertFalse(page.has_previous())
+                seen.extend(page)
+                while page.has_next():
+                    page = self.authorized_client.get(
+                        f'{url}?cursor={page.next_cursor}'
+                    ).context['page_obj']
+                    seen.extend(page)
+                self.assertEqual(
+                    seen,
+                    list(Post.objects.order_by('-pub_date', '-id')))
+                previous = self.authorized_client.get(
+                    f'{url}?cursor={page.previous_cursor}'
+                ).context['page_obj']
+                self.assertEqual(
+                    list(previous), seen[:MAX_POSTS_COUNT])
+
+    def test_broken_cursor_returns_first_page(self):
+        """Некорректный курсор открывает первую страницу."""
+        response = self.authorized_client.get(INDEX_URL + '?cursor=broken')
+        self.assertEqual(
+            list(response.context['page_obj']),
+            list(Post.objects.order_by('-pub_date', '-id')[:MAX_POSTS_COUNT]))
+
+    def test_cursor_with_huge_id_returns_first_page(self):
+        """Курсор с id за пределами INTEGER открывает первую страницу."""
+        cursor = encode_cursor(
+            CURSOR_NEXT, (Post.objects.first().pub_date, 10 ** 23))
+        response = self.authorized_client.get(f'{INDEX_URL}?cursor={cursor}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            list(response.context['page_obj']),
+            list(Post.objects.order_by('-pub_date', '-id')[:MAX_POSTS_COUNT]))
+
+    def test_cursor_past_last_post_returns_first_page(self):
+        """Курсор за последним постом открывает первую страницу."""
+        oldest = Post.objects.order_by('pub_date', 'id').first()
+        cursor = encode_cursor(
+            CURSOR_NEXT, (oldest.pub_date - timedelta(days=1), oldest.pk))
+        first_page = list(
+            Post.objects.order_by('-pub_date', '-id')[:MAX_POSTS_COUNT])
+        for url in (INDEX_URL, GROUP_LIST_URL, PROFILE1_URL):
+            with self.subTest(url=url):
+                response = self.authorized_client.get(
+                    f'{url}?cursor={cursor}')
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    list(response.context['page_obj']), first_page)
+
+
+@NO_PAGE_CACHE
+class PostsQueryCountTests(TestCase):
+    POSTS_COUNT = MAX_POSTS_COUNT
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug=SLUG1,
+            description='Тестовое описание')
+        cls.user = User.objects.create_user(username=USERNAME1)
+        for i in range(cls.POSTS_COUNT):
+            author = User.objects.create_user(username=f'author{i}')
+            group = Group.objects.create(
+                title=f'Группа {i}',
+                slug=f'group{i}',
+                description='Описание')
+            Post.objects.create(text=f'Текст {i}', author=author, group=group)
+        cls.post = Post.objects.create(
+            text='Тестовый пост',
+            author=cls.user,
+            group=cls.group)
+        Post.objects.bulk_create(
+            Post(text=f'Текст {i}', author=cls.user, group=cls.group)
+            for i in range(cls.POSTS_COUNT))
+
+    def setUp(self):
+        self.guest_client = Client()
+        caches['default'].clear()
+        caches[SHARED_CACHE].clear()
+
+    def test_feed_query_count_does_not_depend_on_posts(self):
+        """Ленты и пост загружаются фиксированным числом запросов."""
+        cases = [
+            (INDEX_URL, 2),
+            (GROUP_LIST_URL, 3),
+            (PROFILE1_URL, 3),
+            (reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+             1)]
+        for url, queries in cases:
+            with self.subTest(url=url):
+                with self.assertNumQueries(queries):
+                    self.guest_client.get(url)
+
+    def test_cached_feed_skips_posts_query(self):
+        """Повторная страница ленты берёт посты из кэша фрагментов."""
+        for url in (INDEX_URL, GROUP_LIST_URL, PROFILE1_URL):
+            with self.subTest(url=url):
+                self.guest_client.get(url)
+                with self.assertNumQueries(1 if url == INDEX_URL else 2):
+                    self.guest_client.get(url)
+
+    def test_cached_post_detail(self):
+        """Страница поста берётся из кэша без запросов к базе."""
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        # первый запрос создаёт версии лент, второй кладёт пост в кэш
+        self.guest_client.get(url)
+        self.guest_client.get(url)
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(url)
+        self.assertEqual(response.context['post'], self.post)
+        self.assertEqual(
+            response.context['author_posts_count'], self.POSTS_COUNT + 1)
+
+
+@NO_PAGE_CACHE
+class PostsTimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username=USERNAME1, first_name='Лев', last_name='Толстой')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug=SLUG1,
+            description='Тестовое описание')
+        Post.objects.bulk_create(
+            Post(text=f'Текст {i}', author=cls.user,
+                 group=cls.group if i % 2 else None)
+            for i in range(TIMELINE_SIZE + MAX_POSTS_COUNT))
+
+    def setUp(self):
+        caches['default'].clear()
+        caches[SHARED_CACHE].clear()
+
+    def get_page(self, page, queries=None):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(INDEX_URL, {'page': page})
+        if queries is not None:
+            queries.extend(query['sql'] for query in captured)
+        self.assertEqual(
+            list(response.context['page_obj']),
+            list(Post.objects.all()[
+                (page - 1) * MAX_POSTS_COUNT:page * MAX_POSTS_COUNT]))
+        return response
+
+    def test_first_pages_skip_posts_table(self):
+        """Первые страницы главной ленты не читают посты и авторов."""
+        for page, from_timeline in (
+                (1, True), (TIMELINE_PAGES, True),
+                (TIMELINE_PAGES + 1, False)):
+            with self.subTest(page=page):
+                queries = []
+                response = self.get_page(page, queries)
+                tables = ' '.join(queries)
+                self.assertEqual(
+                    '"posts_post"' not in tables
+                    and '"auth_user"' not in tables, from_timeline)
+        post = response.context['page_obj'][0]
+        self.assertContains(self.get_page(1), 'Лев Толстой')
+        self.assertEqual(post.group, self.group)
+
+    def test_timeline_follows_changes(self):
+        """Правки постов, авторов и групп попадают в главную ленту."""
+        post = Post.objects.first()
+        post.text = 'Исправленный пост'
+        post.save()
+        self.user.first_name = 'Алексей'
+        self.user.save()
+        self.group.title = 'Новое название'
+        self.group.save()
+        self.group.refresh_from_db()
+        content = self.get_page(1).content.decode()
+        for text in ('Исправленный пост', 'Алексей Толстой',
+                     'Новое название'):
+            self.assertIn(text, content)
+        Post.objects.filter(pk=post.pk).delete()
+        # в таблице теперь на пост меньше, последняя страница — из posts_post
+        self.get_page(TIMELINE_PAGES)
+        Post.objects.create(text='Новый пост', author=self.user)
+        self.assertContains(self.get_page(1), 'Новый пост')
+
+
+class PostsFeedCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USERNAME1)
+        cls.another_user = User.objects.create_user(username=USERNAME2)
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug=SLUG1,
+            description='Тестовое описание')
+        cls.another_group = Group.objects.create(
+            title='Дополнительная тестовая группа',
+            slug=SLUG2,
+            description='Тестовое описание дополнительной группы')
+
+    def setUp(self):
+        caches['default'].clear()
+        caches[SHARED_CACHE].clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_new_and_edited_posts_invalidate_only_their_feeds(self):
+        """Создание и правка поста сбрасывают только затронутые ленты."""
+        urls = (INDEX_URL, GROUP_LIST_URL, ANOTHER_GROUP_LIST_URL,
+                PROFILE1_URL, PROFILE2_URL)
+        pages = {url: self.client.get(url).content for url in urls}
+        self.client.post(CREATE_PAGE_URL, {
+            'text': 'Новый пост', 'group': self.group.id})
+        post = Post.objects.get(text='Новый пост')
+        for url in urls:
+            with self.subTest(url=url):
+                content = self.client.get(url).content
+                self.assertEqual(
+                    'Новый пост' in content.decode(),
+                    url in (INDEX_URL, GROUP_LIST_URL, PROFILE1_URL))
+                pages[url] = content
+        self.client.post(
+            reverse('posts:post_edit', kwargs={'post_id': post.id}),
+            {'text': 'Исправленный пост', 'group': self.another_group.id})
+        for url in urls:
+            with self.subTest(url=url):
+                content = self.client.get(url).content.decode()
+                self.assertEqual(
+                    'Исправленный пост' in content,
+                    url != GROUP_LIST_URL and url != PROFILE2_URL)
+                self.assertNotIn('Новый пост', content)
+
+    def test_post_detail_follows_edits_and_author_posts(self):
+        """Кэш страницы поста сбрасывают правка и новые посты автора."""
+        post = Post.objects.create(text='Старый текст', author=self.user)
+        url = reverse('posts:post_detail', kwargs={'post_id': post.id})
+        for _ in range(2):
+            self.client.get(url)
+        self.client.post(
+            reverse('posts:post_edit', kwargs={'post_id': post.id}),
+            {'text': 'Новый текст', 'group': self.group.id})
+        response = self.client.get(url)
+        self.assertEqual(response.context['post'].text, 'Новый текст')
+        self.assertEqual(response.context['post'].group, self.group)
+        self.assertEqual(response.context['author_posts_count'], 1)
+        Post.objects.create(text='Ещё пост', author=self.user)
+        self.assertEqual(
+            self.client.get(url).context['author_posts_count'], 2)
+
+
+class PostsConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USERNAME1)
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug=SLUG1,
+            description='Тестовое описание')
+        cls.post = Post.objects.create(
+            text='Тестовый пост',
+            author=cls.user,
+            group=cls.group)
+        cls.POST_DETAIL_URL = reverse(
+            'posts:post_detail',
+            kwargs={'post_id': cls.post.pk})
+
+    def setUp(self):
+        caches['default'].clear()
+        caches[SHARED_CACHE].clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def revalidate(self, url, response):
+        return self.client.get(
+            url,
+            HTTP_IF_NONE_MATCH=response['ETag'],
+            HTTP_IF_MODIFIED_SINCE=response.get('Last-Modified', ''))
+
+    def test_unchanged_pages_are_not_modified(self):
+        """Без изменений страницы отвечают 304 без рендеринга шаблона."""
+        for url in (INDEX_URL, GROUP_LIST_URL, PROFILE1_URL,
+                    self.POST_DETAIL_URL):
+            with self.subTest(url=url):
+                response = self.revalidate(url, self.client.get(url))
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.templates, [])
+
+    @NO_PAGE_CACHE
+    def test_last_modified_after_change_second(self):
+        """Last-Modified появляется, только когда секунда изменения прошла."""
+        shared = caches[SHARED_CACHE]
+        # часы posts.utils стоят в конце секунды CHANGED
+        with mock.patch('posts.utils.time') as clock:
+            clock.time.return_value = CHANGED + 0.9
+            shared.set(INDEX_FEED, CHANGED + 0.1, None)
+            response = self.client.get(INDEX_URL)
+            self.assertNotIn('Last-Modified', response)
+            # второе изменение в ту же секунду не должно дать 304
+            shared.set(INDEX_FEED, CHANGED + 0.6, None)
+            self.assertEqual(self.client.get(
+                INDEX_URL, HTTP_IF_MODIFIED_SINCE=http_date(CHANGED),
+            ).status_code, 200)
+            shared.set(INDEX_FEED, CHANGED - 10, None)
+            response = self.client.get(INDEX_URL)
+            self.assertEqual(
+                response['Last-Modified'], http_date(CHANGED - 10))
+            self.assertEqual(self.client.get(
+                INDEX_URL,
+                HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+            ).status_code, 304)
+
+    def test_edit_changes_validators(self):
+        """Правка поста делает сохранённые версии страниц устаревшими."""
+        urls = (INDEX_URL, GROUP_LIST_URL, PROFILE1_URL,
+                self.POST_DETAIL_URL)
+        responses = {url: self.client.get(url) for url in urls}
+        self.client.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.id}),
+            {'text': 'Исправленный пост', 'group': self.group.id})
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.revalidate(url, responses[url])
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, 'Исправленный пост')
+
+    def test_validators_depend_on_user(self):
+        """Другой пользователь не получит 304 на чужую версию страницы."""
+        response = self.client.get(INDEX_URL)
+        self.client.logout()
+        self.assertEqual(self.revalidate(INDEX_URL, response).status_code, 200)
@@ -0,0 +1,109 @@
+import threading
+
+from django.core import mail
+from django.db import IntegrityError, connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from core.routers import primary_writes
+from jobs import worker
+from posts.models import Group, Post, PostCounter, TimelineEntry, User
+from posts.writer import PostWriter
+
+
+class PostInsertTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='group', description='Описание')
+
+    @override_settings(MANAGERS=[('Модератор', 'moderator@example.com')])
+    def test_insert_batch(self):
+        """Пачка постов пишется с общими счётчиками, лентой и письмом."""
+        posts = [
+            Post(text=f'Пост {i}', author=self.author, group=self.group)
+            for i in range(3)
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            errors = Post.objects.insert(posts)
+        self.assertEqual(errors, [None] * 3)
+        # по одному UPDATE на счётчик, а не на каждый пост
+        self.assertEqual(len([
+            query for query in queries.captured_queries
+            if query['sql'].startswith('UPDATE "posts_postcounter"')
+        ]), 3)
+        self.assertEqual(
+            PostCounter.objects.value(PostCounter.group_key(self.group.pk)),
+            3)
+        self.assertEqual(TimelineEntry.objects.count(), 3)
+        self.assertEqual(worker.work(once=True), 3)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_insert_keeps_other_posts_on_error(self):
+        """Ошибка одного поста не откатывает остальные посты пачки."""
+        broken = Post(text=None, author=self.author)
+        errors = Post.objects.insert([
+            Post(text='Первый', author=self.author),
+            broken,
+            Post(text='Третий', author=self.author),
+        ])
+        self.assertIsNone(errors[0])
+        self.assertIsInstance(errors[1], IntegrityError)
+        self.assertIsNone(errors[2])
+        self.assertEqual(
+            list(Post.objects.values_list('text', flat=True)),
+            ['Третий', 'Первый'])
+        self.assertEqual(PostCounter.objects.value(PostCounter.TOTAL), 2)
+
+    def test_writer_raises_post_error(self):
+        """Ошибка поста достаётся запросу, который его сохранял."""
+        with self.assertRaises(IntegrityError):
+            PostWriter().save(Post(text=None, author=self.author))
+
+    def test_writer_marks_primary_write(self):
+        """Сохранённый пост закрепляет пользователя за основной базой."""
+        written = []
+        token = primary_writes.set(written)
+        try:
+            PostWriter().save(Post(text='Пост', author=self.author))
+        finally:
+            primary_writes.reset(token)
+        self.assertTrue(written)
+
+
+@override_settings(POST_WRITER={'MAX_WAIT_MS': 200})
+class PostWriterConcurrencyTests(TransactionTestCase):
+    def test_concurrent_posts_share_commits(self):
+        """Посты из параллельных потоков сохраняются общими пачками."""
+        author = User.objects.create_user(username='author')
+        writer = PostWriter()
+        threads_count = 6
+        barrier = threading.Barrier(threads_count)
+        errors = []
+
+        def write(number):
+            barrier.wait()
+            try:
+                writer.save(Post(text=f'Пост {number}', author=author))
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=write, args=(number,))
+            for number in range(threads_count)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        stats = writer.stats.as_dict()
+        self.assertEqual(stats['posts'], threads_count)
+        self.assertLess(stats['batches'], threads_count)
+        self.assertEqual(Post.objects.count(), threads_count)
+        self.assertEqual(
+            PostCounter.objects.value(PostCounter.TOTAL), threads_count)
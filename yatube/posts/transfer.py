@@ -0,0 +1,50 @@
+"""Потоковое чтение и запись постов в JSONL и CSV для импорта/экспорта."""
+import csv
+import json
+import os
+
+FORMATS = ('jsonl', 'csv')
+FIELDS = ('id', 'text', 'pub_date', 'author', 'group')
+
+
+def detect_format(path, fmt=None):
+    if fmt:
+        return fmt
+    extension = os.path.splitext(path)[1].lstrip('.').lower()
+    return 'csv' if extension == 'csv' else 'jsonl'
+
+
+def read_rows(file, fmt):
+    """Построчно отдаёт словари с полями поста, не читая файл целиком."""
+    if fmt == 'csv':
+        yield from csv.DictReader(file)
+        return
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+class RowWriter:
+    def __init__(self, file, fmt):
+        self.file = file
+        self.fmt = fmt
+        if fmt == 'csv':
+            self.csv = csv.DictWriter(file, FIELDS)
+            self.csv.writeheader()
+
+    def write(self, row):
+        if self.fmt == 'csv':
+            self.csv.writerow(row)
+        else:
+            self.file.write(json.dumps(row, ensure_ascii=False) + '\n')
+
+
+def batched(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -1,10 +1,224 @@
+import time
+from collections.abc import Sequence
+from datetime import datetime
+from hashlib import md5
+from operator import attrgetter
+
 from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+from django.utils.cache import get_conditional_response
+from django.utils.http import (http_date, quote_etag, urlsafe_base64_decode,
+                               urlsafe_base64_encode)
+
+from core.routers import replica_may_lag
+
+from .constants import (CURSOR_NEXT, CURSOR_PARAM, CURSOR_PREVIOUS,
+                        MAX_CURSOR_ID, MAX_POSTS_COUNT, TIMELINE_PAGES)
+from .models import TimelineEntry
+
+
+class CountedPaginator(Paginator):
+    """Paginator с заранее известным количеством объектов (без COUNT(*))."""
+
+    def __init__(self, object_list, per_page, count, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count = count
+
+
+def sliced_pages(request, post_list, count=None):
+    if CURSOR_PARAM in request.GET:
+        return cursor_page(post_list, request.GET.get(CURSOR_PARAM))
+    if count is None:
+        paginator = Paginator(post_list, MAX_POSTS_COUNT)
+    else:
+        paginator = CountedPaginator(post_list, MAX_POSTS_COUNT, count)
+    return paginator.get_page(request.GET.get('page'))
+
+
+class TimelinePosts(Sequence):
+    """Посты страницы из TimelineEntry, а если там их не хватает — из ленты.
+
+    Записи читаются только при обращении к странице, так что при попадании
+    во фрагментный кэш запросов к базе нет.
+    """
 
-from .constants import MAX_POSTS_COUNT
+    def __init__(self, entries, fallback, expected):
+        self.entries = entries
+        self.fallback = fallback
+        self.expected = expected
 
+    @cached_property
+    def posts(self):
+        entries = list(self.entries)
+        if len(entries) < self.expected:
+            # после удалений в таблице меньше постов, чем на первых страницах
+            return list(self.fallback)
+        return [entry.as_post() for entry in entries]
 
-def sliced_pages(request, post_list):
-    return Paginator(
-        post_list,
-        MAX_POSTS_COUNT
+    def __len__(self):
+        return len(self.posts)
+
+    def __getitem__(self, index):
+        return self.posts[index]
+
+
+def timeline_page(request, post_list, count):
+    """Страница главной ленты; первые TIMELINE_PAGES — из TimelineEntry."""
+    if CURSOR_PARAM in request.GET:
+        return sliced_pages(request, post_list, count)
+    page = CountedPaginator(
+        TimelineEntry.objects.all(), MAX_POSTS_COUNT, count
     ).get_page(request.GET.get('page'))
+    if page.number > TIMELINE_PAGES:
+        return sliced_pages(request, post_list, count)
+    bottom = (page.number - 1) * MAX_POSTS_COUNT
+    top = min(bottom + MAX_POSTS_COUNT, count)
+    page.object_list = TimelinePosts(
+        page.object_list, post_list[bottom:top], top - bottom)
+    return page
+
+
+def encode_cursor(direction, position):
+    """Упаковывает позицию поста (pub_date, id) в непрозрачный токен."""
+    pub_date, pk = position
+    return urlsafe_base64_encode(
+        f'{direction}{pub_date.isoformat()}|{pk}'.encode()
+    )
+
+
+def decode_cursor(cursor):
+    """Возвращает (направление, pub_date, id) или None для битого токена."""
+    try:
+        raw = urlsafe_base64_decode(cursor).decode()
+        direction, raw = raw[0], raw[1:]
+        pub_date, pk = raw.rsplit('|', 1)
+        pk = int(pk)
+        if direction not in (CURSOR_NEXT, CURSOR_PREVIOUS):
+            return None
+        if not 0 < pk <= MAX_CURSOR_ID:
+            return None
+        return direction, datetime.fromisoformat(pub_date), pk
+    except (ValueError, IndexError):
+        return None
+
+
+class CursorPage(Sequence):
+    """Страница ленты для курсорной пагинации.
+
+    В отличие от Page не знает ни номера страницы, ни их общего
+    количества: только соседние курсоры.
+    """
+    is_cursor = True
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<CursorPage: {len(self)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+def cursor_page(post_list, cursor, position=attrgetter('pub_date', 'pk')):
+    """Курсорная (keyset) пагинация по (pub_date, id).
+
+    Вместо OFFSET берёт записи строго после (или до) позиции из курсора,
+    поэтому глубина страницы не влияет на время запроса. Некорректный
+    курсор ведёт на первую страницу, как и get_page для ?page=.
+    position достаёт (pub_date, id) из записи — для values() это
+    itemgetter('pub_date', 'id').
+    """
+    start = decode_cursor(cursor) if cursor else None
+    if start is None:
+        direction = CURSOR_NEXT
+        posts = post_list.order_by('-pub_date', '-id')
+    else:
+        direction, pub_date, pk = start
+        if direction == CURSOR_NEXT:
+            posts = post_list.filter(
+                Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, id__lt=pk)
+            ).order_by('-pub_date', '-id')
+        else:
+            posts = post_list.filter(
+                Q(pub_date__gt=pub_date) | Q(pub_date=pub_date, id__gt=pk)
+            ).order_by('pub_date', 'id')
+    posts = list(posts[:MAX_POSTS_COUNT + 1])
+    has_more = len(posts) > MAX_POSTS_COUNT
+    posts = posts[:MAX_POSTS_COUNT]
+    if not posts and start is not None:
+        # за курсором ничего не осталось (посты удалены или курсор
+        # старше самого старого поста) — как и для битого курсора,
+        # открывается первая страница
+        return cursor_page(post_list, None, position)
+    if direction == CURSOR_PREVIOUS:
+        posts.reverse()
+        has_next, has_previous = True, has_more
+    else:
+        has_next, has_previous = has_more, start is not None
+    return CursorPage(
+        posts,
+        next_cursor=(
+            encode_cursor(CURSOR_NEXT, position(posts[-1])) if has_next
+            else None
+        ),
+        previous_cursor=(
+            encode_cursor(CURSOR_PREVIOUS, position(posts[0]))
+            if has_previous else None
+        ),
+    )
+
+
+def make_validators(request, *stamps):
+    """ETag и момент последнего изменения данных страницы.
+
+    В ETag входит пользователь: шапка и ссылки на странице зависят от него.
+    """
+    etag = md5(repr((request.user.pk, stamps)).encode()).hexdigest()
+    return quote_etag(etag), max(stamps)
+
+
+def last_modified(changed):
+    """Last-Modified для момента изменения changed.
+
+    Заголовок точен до секунды, поэтому, пока секунда изменения не
+    прошла, его нет: следующее изменение в ту же секунду клиент с
+    If-Modified-Since не заметил бы и получил бы 304.
+    """
+    if time.time() < int(changed) + 1:
+        return None
+    return int(changed)
+
+
+def not_modified(request, validators):
+    """Ответ 304 (или 412), если у клиента актуальная версия страницы."""
+    etag, changed = validators
+    return get_conditional_response(
+        request, etag=etag, last_modified=last_modified(changed))
+
+
+def with_validators(response, validators):
+    etag, changed = validators
+    if replica_may_lag(changed):
+        # страница могла быть собрана по ещё не обновлённой реплике
+        return response
+    response['ETag'] = etag
+    modified = last_modified(changed)
+    if modified is not None:
+        response['Last-Modified'] = http_date(modified)
+    return response
@@ -1,36 +1,137 @@
+from urllib.parse import urlencode
+
+from django.core.paginator import Paginator
+from django.http import Http404
 from django.shortcuts import get_object_or_404, render, redirect
 from django.contrib.auth.decorators import login_required
 
+from core.routers import replica_reads
+from core.utils import cached_reverse
+
+from .caching import (INDEX_FEED, author_feed, feed_cache_context,
+                      feed_version, group_feed)
+from .constants import MAX_POSTS_COUNT
+from .feeds import Feed, feed_response
 from .forms import PostForm
-from .models import Group, Post, User
-from .utils import sliced_pages
+from .loader import PostLoader, load_post_detail
+from .models import Group, Post, PostCounter, User
+from .search import SearchResults
+from .utils import (make_validators, not_modified, sliced_pages,
+                    timeline_page, with_validators)
+from .writer import post_writer
 
 
+@replica_reads
 def index(request):
-    return render(request, 'posts/index.html', {
-        'page_obj': sliced_pages(request, Post.objects.all()),
-    })
+    validators = make_validators(request, feed_version(INDEX_FEED))
+    response = not_modified(request, validators)
+    if response:
+        return response
+    return with_validators(render(request, 'posts/index.html', {
+        'page_obj': timeline_page(
+            request,
+            Post.objects.for_feed(),
+            PostCounter.objects.value(PostCounter.TOTAL),
+        ),
+        **feed_cache_context(INDEX_FEED),
+    }), validators)
 
 
+@replica_reads
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    return render(request, 'posts/group_list.html', {
+    feed = group_feed(group.id)
+    validators = make_validators(request, feed_version(feed))
+    response = not_modified(request, validators)
+    if response:
+        return response
+    return with_validators(render(request, 'posts/group_list.html', {
         'group': group,
-        'page_obj': sliced_pages(request, group.posts.all()),
-    })
+        'page_obj': sliced_pages(
+            request,
+            group.posts.for_feed(),
+            PostCounter.objects.value(PostCounter.group_key(group.id)),
+        ),
+        **feed_cache_context(feed),
+    }), validators)
 
 
+@replica_reads
 def profile(request, username):
     author = get_object_or_404(User, username=username)
-    return render(request, 'posts/profile.html', {
-        'page_obj': sliced_pages(request, author.posts.all()),
+    feed = author_feed(author.id)
+    validators = make_validators(request, feed_version(feed))
+    response = not_modified(request, validators)
+    if response:
+        return response
+    posts_count = PostCounter.objects.value(PostCounter.author_key(author.id))
+    return with_validators(render(request, 'posts/profile.html', {
+        'page_obj': sliced_pages(
+            request, author.posts.for_feed(), posts_count),
         'author': author,
-    })
+        'posts_count': posts_count,
+        **feed_cache_context(feed),
+    }), validators)
 
 
+@replica_reads
 def post_detail(request, post_id):
-    return render(request, 'posts/post_detail.html', {
-        'post': get_object_or_404(Post, id=post_id),
+    detail = load_post_detail(post_id)
+    if detail is None:
+        raise Http404('Пост не найден.')
+    validators = make_validators(request, *detail['stamps'])
+    response = not_modified(request, validators)
+    if response:
+        return response
+    return with_validators(render(request, 'posts/post_detail.html', {
+        'post': detail['post'],
+        'author_posts_count': detail['author_posts_count'],
+    }), validators)
+
+
+def posts_feed(request, feed, posts, title, link):
+    version = feed_version(feed)
+    validators = make_validators(request, version)
+    response = not_modified(request, validators)
+    if response:
+        return response
+    return with_validators(feed_response(
+        Feed(request, title, link, posts, version)), validators)
+
+
+@replica_reads
+def index_feed(request):
+    return posts_feed(
+        request, INDEX_FEED, Post.objects.for_feed(),
+        'Последние обновления на сайте', cached_reverse('posts:index'))
+
+
+@replica_reads
+def group_posts_feed(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return posts_feed(
+        request, group_feed(group.id), group.posts.for_feed(),
+        f'Записи сообщества {group.title}', group.get_absolute_url())
+
+
+@replica_reads
+def profile_feed(request, username):
+    author = get_object_or_404(User, username=username)
+    return posts_feed(
+        request, author_feed(author.id), author.posts.for_feed(),
+        f'Записи {author.get_full_name() or author.username}',
+        cached_reverse('posts:profile', author.username))
+
+
+def search(request):
+    query = request.GET.get('q', '').strip()
+    return render(request, 'posts/search.html', {
+        'query': query,
+        'page_query': urlencode({'q': query}) + '&',
+        'page_obj': Paginator(
+            SearchResults(query, PostLoader.for_request(request)),
+            MAX_POSTS_COUNT
+        ).get_page(request.GET.get('page')) if query else None,
     })
 
 
@@ -41,7 +142,7 @@ def post_create(request):
         return render(request, 'posts/create_post.html', {'form': form})
     post = form.save(False)
     post.author = request.user
-    post.save()
+    post_writer.save(post)
     return redirect('posts:profile', request.user)
 
 
@@ -0,0 +1,176 @@
+"""Групповая запись новых постов.
+
+SQLite выполняет записи строго по одной, и при всплеске публикаций
+каждая транзакция отдельно ждёт блокировку и сброс журнала на диск.
+PostWriter собирает посты, пришедшие из параллельных запросов за
+несколько миллисекунд, и сохраняет их одной транзакцией через
+Post.objects.insert: первый поток становится ведущим и пишет пачку,
+остальные ждут результата своего поста. Счётчики и главная лента
+обновляются для всей пачки сразу, а ошибка одного поста не откатывает
+остальные.
+
+Ждать соседей имеет смысл, только когда посты идут чаще, чем раз в
+MAX_WAIT_MS: интервал между ними сглаживается, и при редких записях
+ведущий пишет сразу, без задержки.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+
+from core.routers import note_primary_write
+
+from .models import Post
+
+logger = logging.getLogger('yatube.writes')
+
+DEFAULT_POST_WRITER = {
+    'ENABLED': True,
+    # сколько ведущий ждёт соседей по пачке
+    'MAX_WAIT_MS': 5,
+    'MAX_BATCH': 50,
+}
+# вес последнего интервала в сглаженном интервале между постами
+SMOOTHING = 0.2
+
+
+class WriterStats:
+    """Размеры пачек и время их коммита в пределах процесса."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.batches = self.posts = self.failed = self.max_batch = 0
+        self.commit_ms = 0.0
+
+    def record(self, size, failed, commit_ms):
+        with self._lock:
+            self.batches += 1
+            self.posts += size
+            self.failed += failed
+            self.max_batch = max(self.max_batch, size)
+            self.commit_ms += commit_ms
+
+    def as_dict(self):
+        with self._lock:
+            batches = self.batches or 1
+            return {
+                'batches': self.batches,
+                'posts': self.posts,
+                'failed': self.failed,
+                'max_batch': self.max_batch,
+                'avg_batch': round(self.posts / batches, 2),
+                'avg_commit_ms': round(self.commit_ms / batches, 3),
+            }
+
+
+class PendingPost:
+    def __init__(self, post):
+        self.post = post
+        self.done = False
+        self.error = None
+
+
+class PostWriter:
+    def __init__(self):
+        self.stats = WriterStats()
+        self._condition = threading.Condition()
+        self._queue = []
+        self._leading = False
+        self._interval = None
+        self._last_arrival = None
+
+    @property
+    def options(self):
+        return {
+            **DEFAULT_POST_WRITER,
+            **getattr(settings, 'POST_WRITER', {}),
+        }
+
+    def save(self, post):
+        """Сохраняет новый пост, возможно в одной транзакции с соседними."""
+        options = self.options
+        if not options['ENABLED']:
+            post.save()
+            return post
+        pending = PendingPost(post)
+        with self._condition:
+            self._arrived()
+            self._queue.append(pending)
+            self._condition.notify_all()
+        while not pending.done:
+            batch = self._wait_turn(pending, options)
+            if batch:
+                self._commit(batch)
+        if pending.error is not None:
+            raise pending.error
+        note_primary_write('posts_post')
+        return post
+
+    def _arrived(self):
+        now = time.monotonic()
+        if self._last_arrival is not None:
+            gap = now - self._last_arrival
+            if self._interval is None:
+                self._interval = gap
+            else:
+                self._interval += SMOOTHING * (gap - self._interval)
+        self._last_arrival = now
+
+    def _idle_time(self, options):
+        """Сколько ждать следующего поста, прежде чем писать пачку.
+
+        Ноль, если посты приходят реже, чем раз в MAX_WAIT_MS.
+        """
+        wait = options['MAX_WAIT_MS'] / 1000
+        if self._interval is None or self._interval >= wait:
+            return 0
+        return min(2 * self._interval, wait)
+
+    def _wait_turn(self, pending, options):
+        """Ждёт, пока пост запишет ведущий или поток сам станет ведущим.
+
+        Ведущему возвращает пачку для записи, остальным — None.
+        """
+        with self._condition:
+            while self._leading and not pending.done:
+                self._condition.wait()
+            if pending.done:
+                return None
+            self._leading = True
+            idle = self._idle_time(options)
+            deadline = time.monotonic() + options['MAX_WAIT_MS'] / 1000
+            while idle and len(self._queue) < options['MAX_BATCH']:
+                # пачка растёт, пока посты приходят не реже раза в idle
+                remaining = deadline - time.monotonic()
+                size = len(self._queue)
+                if remaining <= 0:
+                    break
+                self._condition.wait(min(idle, remaining))
+                if len(self._queue) == size:
+                    break
+            batch = self._queue[:options['MAX_BATCH']]
+            del self._queue[:options['MAX_BATCH']]
+            return batch
+
+    def _commit(self, batch):
+        started = time.perf_counter()
+        try:
+            errors = Post.objects.insert([pending.post for pending in batch])
+        except Exception as error:
+            errors = [error] * len(batch)
+        commit_ms = (time.perf_counter() - started) * 1000
+        failed = len(batch) - errors.count(None)
+        self.stats.record(len(batch), failed, commit_ms)
+        logger.debug(
+            'group commit: %s posts, %s failed, %.1f ms',
+            len(batch), failed, commit_ms)
+        with self._condition:
+            for pending, error in zip(batch, errors):
+                pending.error = error
+                pending.done = True
+            self._leading = False
+            self._condition.notify_all()
+
+
+post_writer = PostWriter()
@@ -0,0 +1,32 @@
+"""Кэш пользователя, которого AuthenticationMiddleware достаёт по сессии.
+
+Без него каждая страница вошедшего пользователя делает SELECT из
+auth_user. Пользователь хранится в кэше 'users' (LRU в памяти процесса)
+недолго — settings.USER_CACHE_TIMEOUT секунд: сохранение или удаление
+пользователя сбрасывает запись только в своём процессе, остальные
+увидят изменения по истечении срока.
+"""
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+
+USER_CACHE = 'users'
+
+
+def user_key(user_id):
+    return f'user:{user_id}'
+
+
+def forget_user(user_id):
+    caches[USER_CACHE].delete(user_key(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    def get_user(self, user_id):
+        cache = caches[USER_CACHE]
+        key = user_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user)
+        return user
@@ -0,0 +1,76 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.cache import SHARED_CACHE
+
+from .backends import USER_CACHE, user_key
+
+User = get_user_model()
+
+SESSION_ENGINES = (
+    'django.contrib.sessions.backends.cached_db',
+    'django.contrib.sessions.backends.signed_cookies',
+)
+
+
+class UserSessionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user_id = User.objects.create_user(
+            username='reader', password='secret-password').pk
+
+    def setUp(self):
+        # тесты меняют пользователя, поэтому у каждого свой экземпляр
+        self.user = User.objects.get(pk=self.user_id)
+        caches['default'].clear()
+        caches[SHARED_CACHE].clear()
+        caches[USER_CACHE].clear()
+
+    def test_pages_do_not_query_session_and_user(self):
+        """Проверка: вошедший пользователь не добавляет запросов к странице."""
+        url = reverse('about:author')
+        for engine in SESSION_ENGINES:
+            with self.subTest(engine=engine), self.settings(
+                    SESSION_ENGINE=engine):
+                client = Client()
+                client.force_login(self.user)
+                client.get(url)
+                with self.assertNumQueries(0):
+                    response = client.get(url)
+                self.assertEqual(response.wsgi_request.user, self.user)
+
+    def test_user_change_resets_cache(self):
+        """Проверка: изменение пользователя сбрасывает его в кэше."""
+        self.client.force_login(self.user)
+        self.client.get(reverse('about:author'))
+        self.assertIsNotNone(caches[USER_CACHE].get(user_key(self.user.pk)))
+        self.user.first_name = 'Читатель'
+        self.user.save()
+        self.assertIsNone(caches[USER_CACHE].get(user_key(self.user.pk)))
+        response = self.client.get(reverse('about:author'))
+        self.assertEqual(response.wsgi_request.user.first_name, 'Читатель')
+
+    def test_password_change_logs_out(self):
+        """Проверка: после смены пароля старая сессия недействительна."""
+        self.client.force_login(self.user)
+        self.client.get(reverse('about:author'))
+        self.user.set_password('new-password')
+        self.user.save()
+        response = self.client.get(reverse('about:author'))
+        self.assertFalse(response.wsgi_request.user.is_authenticated)
+
+    @override_settings(
+        SESSION_ENGINE='django.contrib.sessions.backends.signed_cookies')
+    def test_login_and_logout(self):
+        """Проверка: вход и выход через users работают с сессией в cookie."""
+        response = self.client.post(reverse('users:login'), {
+            'username': 'reader', 'password': 'secret-password'})
+        self.assertRedirects(response, reverse('posts:index'))
+        response = self.client.get(reverse('about:author'))
+        self.assertTrue(response.wsgi_request.user.is_authenticated)
+        self.client.get(reverse('users:logout'))
+        response = self.client.get(reverse('about:author'))
+        self.assertFalse(response.wsgi_request.user.is_authenticated)
@@ -0,0 +1,33 @@
+"""
+ASGI config for yatube project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+
+Run it under uvicorn, for example:
+
+    uvicorn yatube.asgi:application
+
+Several workers (``--workers 4``) need the ``shared`` cache to be common
+to all of them: it is file-based by default, so keep
+YATUBE_SHARED_CACHE_BACKEND=file and point YATUBE_CACHE_DIR at a
+directory every worker can write to. With locmem each worker would keep
+its own feed versions and sessions and serve stale pages.
+
+Django 2.2 has no ASGI handler of its own, so the WSGI application is
+wrapped in uvicorn's WSGIMiddleware (the same as ``uvicorn
+yatube.wsgi:application --interface wsgi``). Views run in a thread pool
+of ASGI_THREADS threads per process, while uvicorn's event loop reads
+requests from clients and sends responses to them chunk by chunk, so
+streaming feeds are not buffered in memory.
+"""
+
+import os
+
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+from uvicorn.middleware.wsgi import WSGIMiddleware
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+application = WSGIMiddleware(
+    get_wsgi_application(), workers=settings.ASGI_THREADS)
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 """
 
 import os
+import sys
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -35,6 +36,12 @@ ALLOWED_HOSTS = [
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
+# модератор получает письма о новых постах, только если адрес задан
+MANAGERS = [
+    ('Модератор', email)
+    for email in os.getenv('YATUBE_MODERATOR_EMAIL', '').split(',') if email
+]
+
 # Application definition
 
 INSTALLED_APPS = [
@@ -42,6 +49,8 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
+    'api.apps.ApiConfig',
+    'jobs.apps.JobsConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -55,6 +64,10 @@ LOGIN_REDIRECT_URL = 'posts:index'
 # LOGOUT_REDIRECT_URL = 'posts:index'
 
 MIDDLEWARE = [
+    'core.middleware.RequestTimingMiddleware',
+    'core.middleware.ReplicaPinMiddleware',
+    'core.middleware.AnonymousPageCacheMiddleware',
+    'core.middleware.EsiPageCacheMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -67,12 +80,33 @@ MIDDLEWARE = [
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+# В продакшене шаблоны компилируются один раз на процесс: cached.Loader
+# и предварительная загрузка частых шаблонов при старте.
+TEMPLATE_CACHE = os.getenv('YATUBE_TEMPLATE_CACHE', str(not DEBUG)) == 'True'
+if TEMPLATE_CACHE:
+    TEMPLATE_LOADERS = [('django.template.loaders.cached.Loader',
+                         TEMPLATE_LOADERS)]
+TEMPLATE_PRELOAD = [
+    'posts/index.html',
+    'posts/group_list.html',
+    'posts/profile.html',
+    'posts/post_detail.html',
+    'includes/post.html',
+    'includes/paginator.html',
+    'includes/cursor_paginator.html',
+    'includes/header.html',
+    'includes/post_edit_link.html',
+]
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.timing.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': TEMPLATE_LOADERS,
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -85,6 +119,9 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
+ASGI_APPLICATION = 'yatube.asgi.application'
+# потоков на процесс uvicorn, в которых выполняются представления
+ASGI_THREADS = int(os.getenv('YATUBE_ASGI_THREADS', 16))
 
 
 # Database
@@ -94,9 +131,151 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # соединение переживает запрос и переиспользуется потоком
+        'CONN_MAX_AGE': int(os.getenv('YATUBE_DB_CONN_MAX_AGE', 600)),
+        'OPTIONS': {
+            # сколько секунд ждать снятия блокировки записи
+            'timeout': 5,
+        },
     }
 }
 
+# Реплики только для чтения (core.routers). Локально это копии основной
+# базы в отдельных файлах, их обновляет manage.py sync_replicas:
+# YATUBE_DB_REPLICAS=replica python manage.py sync_replicas
+DATABASE_REPLICAS = [
+    alias for alias in os.getenv('YATUBE_DB_REPLICAS', '').split(',')
+    if alias
+]
+for alias in DATABASE_REPLICAS:
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'NAME': os.path.join(BASE_DIR, f'{alias}.sqlite3'),
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+# насколько реплика может отставать: столько секунд автор после записи
+# читает основную базу, а свежие ленты с реплики не кэшируются
+REPLICA_LAG_SECONDS = int(os.getenv('YATUBE_REPLICA_LAG_SECONDS', 5))
+
+# Прагмы для каждого нового соединения SQLite (core.db).
+# WAL позволяет читать ленты во время записи поста; при synchronous=NORMAL
+# fsync делается на контрольной точке, а не на каждой транзакции.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    # отрицательное значение — размер в КиБ: 64 МиБ страничного кэша
+    'cache_size': -64 * 1024,
+    'mmap_size': 256 * 1024 * 1024,
+    'busy_timeout': 5000,
+    'temp_store': 'MEMORY',
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/2.2/topics/cache/
+# locmem — LRU в памяти процесса (один узел, один воркер),
+# file — файловый кэш, общий для воркеров gunicorn на одном хосте.
+#
+# В default лежат фрагменты, готовые страницы и страницы постов: их ключи
+# содержат версии лент и страниц, поэтому default может быть своим у
+# каждого воркера. Сами версии, метки изменённых постов, загруженные посты
+# и сессии лежат в shared: его меняет запись в любом воркере, и он должен
+# быть общим для всех (locmem годится только для одного процесса).
+
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'core.cache.backends.LRUCache',
+        'LOCATION': 'yatube',
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+            'MAX_BYTES': 64 * 1024 * 1024,
+        },
+    },
+    'file': {
+        'BACKEND': 'core.cache.backends.FileBasedCache',
+        'LOCATION': os.getenv(
+            'YATUBE_CACHE_DIR', os.path.join(BASE_DIR, 'cache')),
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': 50000,
+        },
+    },
+}
+
+SHARED_CACHE_BACKENDS = {
+    'locmem': {
+        **CACHE_BACKENDS['locmem'],
+        'LOCATION': 'yatube-shared',
+    },
+    'file': {
+        **CACHE_BACKENDS['file'],
+        'LOCATION': os.path.join(CACHE_BACKENDS['file']['LOCATION'], 'shared'),
+    },
+}
+
+# тесты и замеры пишут в shared свои посты и сбрасывают его: общий кэш
+# запущенного сайта им не достаётся, у процесса свой в памяти
+ISOLATED_SHARED_CACHE = (
+    sys.argv[1:2] in (['test'], ['benchmark_posts'])
+    or 'pytest' in sys.modules
+)
+
+USER_CACHE_TIMEOUT = int(os.getenv('YATUBE_USER_CACHE_TIMEOUT', 60))
+
+CACHES = {
+    'default': CACHE_BACKENDS[os.getenv('YATUBE_CACHE_BACKEND', 'locmem')],
+    'shared': SHARED_CACHE_BACKENDS[
+        'locmem' if ISOLATED_SHARED_CACHE
+        else os.getenv('YATUBE_SHARED_CACHE_BACKEND', 'file')],
+    # вошедшие пользователи (users.backends), всегда в памяти процесса
+    'users': {
+        'BACKEND': 'core.cache.backends.LRUCache',
+        'LOCATION': 'yatube-users',
+        'TIMEOUT': USER_CACHE_TIMEOUT,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+}
+
+
+# Готовые страницы из кэша (core.middleware): анонимам — целиком,
+# вошедшим — общее тело с их шапкой (core.esi)
+
+PAGE_CACHE = {
+    'ENABLED': os.getenv('YATUBE_PAGE_CACHE', 'True') == 'True',
+    'TIMEOUT': int(os.getenv('YATUBE_PAGE_CACHE_TIMEOUT', 60)),
+    'VIEWS': (
+        'posts:index',
+        'posts:group_list',
+        'posts:profile',
+        'posts:post_detail',
+    ),
+    # для вошедших: общая страница из кэша, шапка — своя (core.esi)
+    'ESI': os.getenv('YATUBE_PAGE_CACHE_ESI', 'True') == 'True',
+}
+
+
+# Sessions
+# https://docs.djangoproject.com/en/2.2/topics/http/sessions/
+# cached_db — сессия читается из кэша и пишется в базу только при
+# изменении; signed_cookies — сессия целиком в подписанной cookie, без
+# таблицы и без кэша, но её нельзя отозвать на сервере до истечения.
+
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+
+SESSION_ENGINE = SESSION_ENGINES[os.getenv('YATUBE_SESSIONS', 'cached_db')]
+# выход в одном воркере должен завершать сессию во всех
+SESSION_CACHE_ALIAS = 'shared'
+
+AUTHENTICATION_BACKENDS = ['users.backends.CachedModelBackend']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -131,6 +310,68 @@ USE_L10N = True
 USE_TZ = True
 
 
+# Фоновые задачи (приложение jobs)
+# Синхронно задачи выполняются после коммита в том же процессе: для
+# разработки без воркеров. Ошибки задач тогда только пишутся в лог.
+
+TASKS_SYNC = os.getenv('YATUBE_TASKS_SYNC', 'False') == 'True'
+
+TASKS = {
+    'MAX_ATTEMPTS': 5,
+    'RETRY_DELAY': 10,
+    'BATCH_SIZE': int(os.getenv('YATUBE_TASKS_BATCH_SIZE', 50)),
+    'LEASE_SECONDS': 300,
+    'POLL_SECONDS': 1,
+}
+
+
+# Групповая запись новых постов (posts.writer): ведущий поток ждёт соседей
+# по транзакции не дольше MAX_WAIT_MS и только при частых публикациях.
+
+POST_WRITER = {
+    'ENABLED': os.getenv('YATUBE_GROUP_COMMIT', 'True') == 'True',
+    'MAX_WAIT_MS': float(os.getenv('YATUBE_GROUP_COMMIT_WAIT_MS', 5)),
+    'MAX_BATCH': 50,
+}
+
+
+# Logging
+# https://docs.djangoproject.com/en/2.2/topics/logging/
+
+REQUEST_TIMING = {
+    'SLOW_MS': int(os.getenv('YATUBE_SLOW_REQUEST_MS', 500)),
+    'SLOW_SAMPLE_RATE': float(os.getenv('YATUBE_SLOW_SAMPLE_RATE', 1.0)),
+    'MAX_QUERIES_LOGGED': 50,
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'yatube.requests': {
+            'handlers': ['console'],
+            'level': os.getenv('YATUBE_REQUEST_LOG_LEVEL', 'WARNING'),
+            'propagate': False,
+        },
+        'yatube.writes': {
+            'handlers': ['console'],
+            'level': os.getenv('YATUBE_WRITE_LOG_LEVEL', 'WARNING'),
+            'propagate': False,
+        },
+        'yatube.jobs': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
+
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/2.2/howto/static-files/
 